@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+# Elaborates BaseSoC/EthernetSoC of every target (without compiling gateware/software) and records
+# the wall time of each phase and the peak RSS. Each SoC is elaborated in a fresh interpreter so
+# that peak RSS and import costs are not shared between SoCs. Results are written as JSON and can
+# be compared against a previous run (--compare).
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+phases = ["platform", "soc", "finalize", "verilog"]
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def peak_rss():
+    """Peak resident set size of the current process, in bytes"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss*1024
+
+
+def target_platform(target):
+    """Platform module used by a target module"""
+    for obj in vars(target).values():
+        if getattr(obj, "__name__", "").startswith("litex_boards.") and \
+           ".platforms." in obj.__name__:
+            return obj
+    raise ValueError("no platform module found in {}".format(target.__name__))
+
+
+def list_socs(targets):
+    """(target, SoC class) pairs to benchmark"""
+    import litex_boards.targets
+    socs = []
+    for name in targets or litex_boards.targets.__all__:
+        if name == "simple": # Generic target, requires a platform.
+            continue
+        target = getattr(litex_boards.targets, name)
+        for cls in ["BaseSoC", "EthernetSoC"]:
+            if hasattr(target, cls):
+                socs.append((name, cls))
+    return socs
+
+# Elaboration --------------------------------------------------------------------------------------
+
+def elaborate(name, cls):
+    """Elaborate one SoC in the current interpreter and return its measures"""
+    from litex.soc.integration.builder import Builder
+    import litex_boards.targets
+    target = getattr(litex_boards.targets, name)
+    results = {}
+
+    # Time the platform construction done by the SoC: the interpreter only runs this SoC.
+    platform_cls  = target_platform(target).Platform
+    platform_init = platform_cls.__init__
+    def timed_platform_init(self, *args, **kwargs):
+        start = time.time()
+        platform_init(self, *args, **kwargs)
+        results["platform"] += time.time() - start
+    results["platform"] = 0
+    platform_cls.__init__ = timed_platform_init
+    try:
+        start = time.time()
+        soc = getattr(target, cls)()
+        results["soc"] = time.time() - start - results["platform"]
+    finally:
+        platform_cls.__init__ = platform_init
+
+    start = time.time()
+    soc.finalize()
+    results["finalize"] = time.time() - start
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        start = time.time()
+        builder = Builder(soc, output_dir=output_dir, compile_software=False, compile_gateware=False)
+        builder.build()
+        results["verilog"] = time.time() - start
+    finally:
+        shutil.rmtree(output_dir)
+
+    results["total"]    = sum(results[phase] for phase in phases)
+    results["peak_rss"] = peak_rss()
+    return results
+
+
+def run(socs):
+    results = {}
+    for name, cls in socs:
+        key = "{}:{}".format(name, cls)
+        try:
+            output = subprocess.check_output([sys.executable, __file__, "--elaborate", key])
+            results[key] = json.loads(output.decode().splitlines()[-1])
+        except subprocess.CalledProcessError as e:
+            results[key] = {"error": e.returncode}
+        print(format_result(key, results[key]))
+    return results
+
+# Report -------------------------------------------------------------------------------------------
+
+def format_result(key, result, baseline=None):
+    if "error" in result:
+        return "{:28s} FAIL".format(key)
+    s = "{:28s}".format(key)
+    for phase in phases + ["total"]:
+        s += " {}={:6.2f}s".format(phase, result[phase])
+    s += " rss={:6.1f}MB".format(result["peak_rss"]/1e6)
+    if baseline is not None and "error" not in baseline:
+        s += " (time {:+.1%}, rss {:+.1%})".format(
+            result["total"]/baseline["total"] - 1,
+            result["peak_rss"]/baseline["peak_rss"] - 1)
+    return s
+
+
+def compare(results, baseline):
+    for key, result in sorted(results.items()):
+        print(format_result(key, result, baseline.get(key)))
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX-Boards elaboration benchmark")
+    parser.add_argument("--output", default="elaboration.json",
+                        help="JSON results file (default=elaboration.json)")
+    parser.add_argument("--compare", default=None,
+                        help="JSON results file of a previous run to compare against")
+    parser.add_argument("--elaborate", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("targets", nargs="*",
+                        help="targets to benchmark (default=all)")
+    args = parser.parse_args()
+
+    if args.elaborate is not None:
+        result = elaborate(*args.elaborate.split(":"))
+        sys.stdout.flush()
+        print(json.dumps(result))
+        return
+
+    results = run(list_socs(args.targets))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
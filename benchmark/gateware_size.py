@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+# Generates the gateware of every board (target BaseSoC, or simple SoC for boards without target)
+# without compiling it and measures the emitted top.v: modules, registers (signals assigned in
+# synchronous processes), memory bits, lines and bytes. Results are compared against a baseline
+# and boards growing past a threshold (or newly failing) are flagged, catching designs that would
+# no longer fit small devices before place and route.
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+metrics = ["modules", "registers", "register_bits", "memory_bits", "lines", "bytes"]
+
+# Verilog Measures ---------------------------------------------------------------------------------
+
+_reg  = re.compile(r"^\s*reg\s*(?:signed\s*)?(?:\[(\d+):(\d+)\])?\s*(\w+)\s*(?:\[(\d+):(\d+)\])?")
+# Non-blocking assignments: only emitted by Migen in synchronous (always @(posedge ...)) processes.
+_sync = re.compile(r"^\s*(\w+)\s*(?:\[[^\]]*\])?\s*<=")
+
+
+def measure(verilog):
+    """Size measures of a Verilog source"""
+    r = {metric: 0 for metric in metrics}
+    r["lines"] = verilog.count("\n")
+    r["bytes"] = len(verilog.encode())
+    lines = verilog.splitlines()
+    # Combinatorial signals are also declared reg: only count the ones assigned synchronously.
+    sync = {m.group(1) for m in map(_sync.match, lines) if m is not None}
+    for line in lines:
+        if line.startswith("module "):
+            r["modules"] += 1
+            continue
+        m = _reg.match(line)
+        if m is None:
+            continue
+        msb, lsb, name, first, last = m.groups()
+        width = abs(int(msb) - int(lsb)) + 1 if msb is not None else 1
+        if first is not None:
+            r["memory_bits"] += width*(abs(int(last) - int(first)) + 1)
+        elif name in sync:
+            r["registers"]     += 1
+            r["register_bits"] += width
+    return r
+
+# Generation ---------------------------------------------------------------------------------------
+
+def list_boards():
+    import litex_boards.targets
+    import litex_boards.platforms
+    return sorted(set(litex_boards.targets.__all__ + litex_boards.platforms.__all__) - {"simple"})
+
+
+def generate(board, output_dir):
+    """Generate the gateware of a board in output_dir and return the top.v content"""
+    from litex.soc.integration.builder import Builder
+    import litex_boards.targets
+    import litex_boards.platforms
+    from litex_boards.official.targets import simple
+    builder_kwargs = dict(compile_software=False, compile_gateware=False)
+    if board in litex_boards.targets.__all__:
+        soc = getattr(litex_boards.targets, board).BaseSoC()
+        Builder(soc, output_dir=output_dir, **builder_kwargs).build()
+    else:
+        platform = getattr(litex_boards.platforms, board).__name__
+        [(_, error, _)] = simple.build_batch([platform],
+            output_dir     = output_dir,
+            builder_kwargs = builder_kwargs,
+            cpu_type       = "vexriscv",
+            uart_stub      = True)
+        if error is not None:
+            raise RuntimeError(error)
+        output_dir = os.path.join(output_dir, board)
+    with open(os.path.join(output_dir, "gateware", "top.v")) as f:
+        return f.read()
+
+
+def report(boards):
+    results = {}
+    for board in boards:
+        output_dir = tempfile.mkdtemp()
+        try:
+            results[board] = measure(generate(board, output_dir))
+        except Exception as e:
+            results[board] = {"error": "{}: {}".format(type(e).__name__, e)}
+        finally:
+            shutil.rmtree(output_dir)
+    return results
+
+# Regressions --------------------------------------------------------------------------------------
+
+def regressions(results, baseline, threshold):
+    """(board, metric, baseline, value) of the measures growing more than threshold
+
+    Boards failing without failing in the baseline are reported with the "error" metric.
+    """
+    r = []
+    for board, result in sorted(results.items()):
+        reference = baseline.get(board, {})
+        if "error" in result and "error" not in reference:
+            r.append((board, "error", None, result["error"]))
+            continue
+        for metric in metrics:
+            if metric in result and reference.get(metric):
+                if result[metric] > reference[metric]*(1 + threshold):
+                    r.append((board, metric, reference[metric], result[metric]))
+    return r
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX-Boards gateware size report")
+    parser.add_argument("--output", default="gateware_size.json",
+                        help="JSON results file (default=gateware_size.json)")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results file of the baseline to check against")
+    parser.add_argument("--threshold", default=0.05, type=float,
+                        help="relative growth flagged as a regression (default=0.05)")
+    parser.add_argument("boards", nargs="*",
+                        help="boards to report (default=all)")
+    args = parser.parse_args()
+
+    results = report(args.boards or list_boards())
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+
+    for board, result in sorted(results.items()):
+        if "error" in result:
+            print("{:16s} FAIL {}".format(board, result["error"]))
+        else:
+            print("{:16s} ".format(board) + " ".join("{}={}".format(m, result[m]) for m in metrics))
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        flagged = regressions(results, baseline, args.threshold)
+        for board, metric, reference, value in flagged:
+            if metric == "error":
+                print("{:16s} newly fails: {}".format(board, value))
+                continue
+            print("{:16s} {} grew from {} to {} ({:+.1%})".format(
+                board, metric, reference, value, value/reference - 1))
+        if flagged:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+# Measures the startup latency of single-board scripts: a fresh interpreter importing one board
+# through the lazy registries, compared with importing every board module (the behaviour of the
+# former star-import registries).
+
+import sys
+import time
+import argparse
+import subprocess
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def import_duration(statement, repeat):
+    """Best wall time of a fresh interpreter running statement, over repeat runs"""
+    durations = []
+    for i in range(repeat):
+        start = time.time()
+        subprocess.check_call([sys.executable, "-c", statement])
+        durations.append(time.time() - start)
+    return min(durations)
+
+
+def eager_statement(registry):
+    return "import litex_boards.{r} as r; [getattr(r, b) for b in r.__all__]".format(r=registry)
+
+
+def lazy_statement(registry, board):
+    return "from litex_boards.{r} import {b}".format(r=registry, b=board)
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX-Boards import time benchmark")
+    parser.add_argument("--registry", default="platforms",
+                        help="registry to benchmark: platforms (default) or targets")
+    parser.add_argument("--repeat", default=5, type=int,
+                        help="number of runs per measure, best one is kept (default=5)")
+    parser.add_argument("boards", nargs="*", default=["arty"],
+                        help="boards to import (default=arty)")
+    args = parser.parse_args()
+
+    eager = import_duration(eager_statement(args.registry), args.repeat)
+    print("{:16s} {:8.3f}s".format("all boards", eager))
+    for board in args.boards:
+        lazy = import_duration(lazy_statement(args.registry, board), args.repeat)
+        print("{:16s} {:8.3f}s ({:.1f}x faster)".format(board, lazy, eager/lazy))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+# Measures request-heavy elaboration on the largest platforms: every resource of the _io table is
+# requested and then looked up repeatedly (as done by targets and do_finalize), with the generic
+# LiteX ConstraintManager and with the IndexedConstraintManager.
+
+import time
+import argparse
+
+from litex.build.generic_platform import ConstraintManager
+
+from litex_boards.constraints import IndexedConstraintManager
+import litex_boards.platforms
+
+# Benchmark ----------------------------------------------------------------------------------------
+
+def request_duration(manager_cls, platform_module, lookups):
+    manager   = manager_cls(platform_module._io, platform_module._connectors)
+    resources = [(resource[0], resource[1]) for resource in platform_module._io]
+    start = time.time()
+    for name, number in resources:
+        manager.request(name, number)
+    for i in range(lookups):
+        for name, number in resources:
+            manager.lookup_request(name, number)
+    return time.time() - start
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX-Boards resource request benchmark")
+    parser.add_argument("--lookups", default=100, type=int,
+                        help="number of lookups of each requested resource (default=100)")
+    parser.add_argument("platforms", nargs="*", default=["kc705", "kcu105"],
+                        help="platforms to benchmark (default=kc705 kcu105)")
+    args = parser.parse_args()
+
+    for name in args.platforms:
+        platform_module = getattr(litex_boards.platforms, name)
+        generic = request_duration(ConstraintManager, platform_module, args.lookups)
+        indexed = request_duration(IndexedConstraintManager, platform_module, args.lookups)
+        print("{:16s} {:4d} resources: generic {:8.3f}s, indexed {:8.3f}s ({:.1f}x faster)".format(
+            name, len(platform_module._io), generic, indexed, generic/indexed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import os
+import sys
+import shutil
+import hashlib
+import inspect
+import tempfile
+
+__all__ = ["build_cache_key", "cached_build", "build_cache_args", "build_cache_argdict"]
+
+# Build Cache --------------------------------------------------------------------------------------
+
+# Libraries generating the gateware and the software of the targets.
+_libraries = ["migen", "litex", "litedram", "liteeth"]
+
+# Text files of the build outputs where the absolute output directory is relocated on restore
+# (variables.mak, make dependencies, linker scripts).
+_relocated_suffixes = [".mak", ".d", ".ld", ".h"]
+_output_dir_placeholder = b"@BUILD_CACHE_OUTPUT_DIR@"
+
+# Builder outputs written outside of the output directory (paths given by the user).
+_builder_outputs = ["csr_csv", "csr_json"]
+
+
+def _source(obj):
+    try:
+        with open(inspect.getsourcefile(obj), "rb") as f:
+            return f.read()
+    except (TypeError, OSError):
+        return b""
+
+
+def _file(filename):
+    try:
+        with open(filename, "rb") as f:
+            return f.read()
+    except OSError:
+        return b""
+
+
+def _module_sources(h):
+    # Helper modules of litex_boards (sdram, ethernet, constraints...) and loaded library modules.
+    for name, module in sorted(sys.modules.items(), key=lambda m: m[0]):
+        package = name.split(".")[0]
+        helper  = package == "litex_boards" and name.count(".") == 1
+        if helper or package in _libraries:
+            filename = vars(module).get("__file__") # getattr can trigger lazy imports.
+            if filename is not None:
+                h.update(name.encode())
+                h.update(_file(filename))
+    # Sources of the BIOS and of the software libraries, built with the gateware.
+    litex = sys.modules.get("litex")
+    if litex is not None and getattr(litex, "__file__", None) is not None:
+        software = os.path.join(os.path.dirname(litex.__file__), "soc", "software")
+        for root, dirs, files in os.walk(software):
+            dirs.sort()
+            for f in sorted(files):
+                h.update(f.encode())
+                h.update(_file(os.path.join(root, f)))
+
+
+def build_cache_key(soc, arguments=None):
+    """Hash of everything the Builder output of a target depends on.
+
+    Covers the platform (device, _io, _connectors and source), the SoC (CPU type/variant, mem_map,
+    clock frequency and the source of the target classes), the build arguments, the helper modules
+    of litex_boards and the loaded sources of Migen, LiteX (with its software), LiteDRAM and
+    LiteEth.
+    """
+    arguments = arguments or {}
+    platform = soc.platform
+    platform_module = sys.modules[platform.__module__]
+    h = hashlib.sha256()
+    def update(name, value):
+        h.update("{}={!r}\n".format(name, value).encode())
+    update("device",      platform.device)
+    update("io",          getattr(platform_module, "_io", None))
+    update("connectors",  getattr(platform_module, "_connectors", None))
+    update("cpu_type",    getattr(soc, "cpu_type", None))
+    update("cpu_variant", getattr(soc, "cpu_variant", None))
+    update("mem_map",     sorted(soc.mem_map.items()))
+    update("clk_freq",    soc.clk_freq)
+    update("arguments",   sorted((k, v) for k, v in arguments.items()
+        if k not in ["output_dir", "build_cache"]))
+    h.update(_source(platform_module))
+    for cls in type(soc).__mro__:
+        if cls.__module__.startswith("litex_boards") or cls.__module__ == "__main__":
+            h.update(_source(cls))
+    _module_sources(h)
+    return h.hexdigest()
+
+
+def _copy_tree(src, dst, relocate):
+    """Copy src to dst, replacing relocate[0] by relocate[1] in the relocated text files."""
+    old, new = relocate
+    for root, dirs, files in os.walk(src):
+        path = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(path, exist_ok=True)
+        for f in files:
+            src_file = os.path.join(root, f)
+            dst_file = os.path.join(path, f)
+            if os.path.splitext(f)[1] in _relocated_suffixes:
+                with open(src_file, "rb") as fi, open(dst_file, "wb") as fo:
+                    fo.write(fi.read().replace(old, new))
+                shutil.copystat(src_file, dst_file)
+            else:
+                shutil.copy2(src_file, dst_file)
+
+
+def _outputs(builder):
+    outputs = []
+    for name in _builder_outputs:
+        path = getattr(builder, name, None)
+        if path is not None:
+            outputs.append((name, path))
+    return outputs
+
+
+def cached_build(builder, cache_dir=None, arguments=None, **kwargs):
+    """Run builder.build(**kwargs), or restore its output from cache_dir when already built.
+
+    Builder outputs are stored in cache_dir/<build_cache_key>: the output directory and the CSR
+    csv/json files, which can be written anywhere; without cache_dir, this is a plain
+    builder.build(). The absolute output directory written in the generated files (variables.mak,
+    make dependencies) is replaced by the one of the restoring build.
+    """
+    if cache_dir is None:
+        return builder.build(**kwargs)
+    key = build_cache_key(builder.soc, dict(arguments or {}, **kwargs))
+    entry = os.path.join(cache_dir, key)
+    output_dir = os.path.abspath(builder.output_dir).encode()
+    outputs = _outputs(builder)
+    stored  = all(os.path.isfile(os.path.join(entry, name)) for name, _ in outputs)
+    if stored and os.path.isdir(os.path.join(entry, "output")):
+        print("Build cache hit ({}), restoring {}".format(key[:16], builder.output_dir))
+        _copy_tree(os.path.join(entry, "output"), builder.output_dir,
+            (_output_dir_placeholder, output_dir))
+        for name, path in outputs:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copy2(os.path.join(entry, name), path)
+        return None
+    vns = builder.build(**kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=cache_dir)
+    _copy_tree(builder.output_dir, os.path.join(tmp, "output"),
+        (output_dir, _output_dir_placeholder))
+    for name, path in outputs:
+        if os.path.isfile(path):
+            shutil.copy2(path, os.path.join(tmp, name))
+    try:
+        os.rename(tmp, entry)
+    except OSError: # Concurrently stored by another build (or stored without these outputs).
+        shutil.rmtree(tmp)
+    return vns
+
+
+def build_cache_args(parser):
+    parser.add_argument("--build-cache", default=None,
+                        help="directory of the build cache, restores the build outputs of already "
+                             "built configurations (default=disabled)")
+
+
+def build_cache_argdict(args):
+    return {
+        "cache_dir": args.build_cache,
+        "arguments": vars(args),
+    }
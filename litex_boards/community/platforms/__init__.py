@@ -1,6 +1,10 @@
-from litex_boards.community.platforms import ac701
-from litex_boards.community.platforms import de10lite
-from litex_boards.community.platforms import de1soc
-from litex_boards.community.platforms import de2_115
-from litex_boards.community.platforms import ecp5_evn
-from litex_boards.community.platforms import sp605
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "ac701",
+    "de10lite",
+    "de1soc",
+    "de2_115",
+    "ecp5_evn",
+    "sp605",
+])
@@ -1,5 +1,9 @@
-from litex_boards.community.targets import ac701
-from litex_boards.community.targets import de10lite
-from litex_boards.community.targets import de1soc
-from litex_boards.community.targets import de2_115
-from litex_boards.community.targets import ecp5_evn
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "ac701",
+    "de10lite",
+    "de1soc",
+    "de2_115",
+    "ecp5_evn",
+])
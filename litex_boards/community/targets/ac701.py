@@ -11,17 +11,19 @@ from migen import *
 from litex_boards.platforms import ac701
 
 from litex.soc.cores.clock import *
-from litex.soc.integration.soc_core import mem_decoder
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+from litex_boards.ethernet import *
+
 from litedram.modules import MT8JTF12864
 from litedram.phy import s7ddrphy
 
 from liteeth.phy.a7_gtp import QPLLSettings, QPLL
 from liteeth.phy.a7_1000basex import A7_1000BASEX
 from liteeth.phy.s7rgmii import LiteEthPHYRGMII
-from liteeth.mac import LiteEthMAC
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -51,7 +53,8 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(100e6), **kwargs):
+    def __init__(self, sys_clk_freq=int(100e6),
+        with_sdram_bist=False, with_sdram_stats=False, **kwargs):
         platform = ac701.Platform()
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                          integrated_rom_size=0x8000,
@@ -64,9 +67,14 @@ class BaseSoC(SoCSDRAM):
         self.submodules.ddrphy = s7ddrphy.A7DDRPHY(platform.request("ddram"), sys_clk_freq=sys_clk_freq)
         self.add_csr("ddrphy")
         sdram_module = MT8JTF12864(sys_clk_freq, "1:4")
+        check_l2_size(self.l2_size, self.ddrphy, sdram_module)
         self.register_sdram(self.ddrphy,
                             sdram_module.geom_settings,
                             sdram_module.timing_settings)
+        if with_sdram_bist:
+            add_sdram_bist(self)
+        if with_sdram_stats:
+            add_sdram_stats(self)
 
 # EthernetSoC --------------------------------------------------------------------------------------
 
@@ -76,7 +84,7 @@ class EthernetSoC(BaseSoC):
     }
     mem_map.update(BaseSoC.mem_map)
 
-    def __init__(self, phy="rgmii", **kwargs):
+    def __init__(self, phy="rgmii", ethernet_kwargs=None, **kwargs):
         assert phy in ["rgmii", "1000basex"]
         BaseSoC.__init__(self, **kwargs)
 
@@ -120,30 +128,27 @@ class EthernetSoC(BaseSoC):
                 self.ethphy.txoutclk,
                 self.ethphy.rxoutclk)
 
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness)
-        self.add_wb_slave(mem_decoder(self.mem_map["ethmac"]), self.ethmac.bus)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethernet(self, self.ethphy, **(ethernet_kwargs or {}))
 
 # Build --------------------------------------------------------------------------------------------
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on AC701")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
-    parser.add_argument("--with-ethernet", action="store_true",
-                        help="enable Ethernet support")
+    sdram_args(parser)
+    ethernet_args(parser)
     parser.add_argument("--ethernet-phy", default="rgmii",
                         help="select Ethernet PHY (rgmii or 1000basex)")
     args = parser.parse_args()
 
-    if args.with_ethernet:
-        soc = EthernetSoC(args.ethernet_phy, **soc_sdram_argdict(args))
+    if ethernet_argdict(args):
+        soc = EthernetSoC(args.ethernet_phy, **soc_sdram_argdict(args), **sdram_argdict(args),
+            **ethernet_argdict(args))
     else:
-        soc = BaseSoC(**soc_sdram_argdict(args))
+        soc = BaseSoC(**soc_sdram_argdict(args), **sdram_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
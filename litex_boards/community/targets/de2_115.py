@@ -12,13 +12,16 @@ from litex_boards.platforms import de2_115
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+
 from litedram.modules import IS42S16320
 from litedram.phy import GENSDRPHY
 
 # CRG ------------------------------------------------------------------
 
 class _CRG(Module):
-    def __init__(self, platform):
+    def __init__(self, platform, sdram_phase=None):
         self.clock_domains.cd_sys = ClockDomain()
         self.clock_domains.cd_sys_ps = ClockDomain()
         self.clock_domains.cd_por = ClockDomain(reset_less=True)
@@ -59,40 +62,59 @@ class _CRG(Module):
                 i_FBIN=1,
                 i_PFDENA=1,
                 i_PLLENA=1,
+                **altpll_phase_params(sdram_phase)
             )
         self.comb += platform.request("sdram_clock").eq(self.cd_sys_ps.clk)
 
 # BaseSoC --------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(50e6), **kwargs):
+    mem_map = {
+        "sdram_phase_ram": 0x20000000,  # (shadow @0xa0000000)
+    }
+    mem_map.update(SoCSDRAM.mem_map)
+
+    def __init__(self, sys_clk_freq=int(50e6),
+        with_sdram_bist=False, with_sdram_stats=False, with_sdram_phase=False, **kwargs):
         assert sys_clk_freq == int(50e6)
         platform = de2_115.Platform()
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                           integrated_rom_size=0x8000,
                           **kwargs)
 
-        self.submodules.crg = _CRG(platform)
+        sdram_phase = None
+        if with_sdram_phase:
+            # steps scanned by the calibration: at least one sys period at the maximum VCO frequency
+            sdram_phase = add_sdram_phase(self, 8*int(1300e6//sys_clk_freq))
+        self.submodules.crg = _CRG(platform, sdram_phase)
 
         if not self.integrated_main_ram_size:
             self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"))
             # ISSI IS42S16320D-7TL
             sdram_module = IS42S16320(self.clk_freq, "1:1")
+            check_l2_size(self.l2_size, self.sdrphy, sdram_module)
             self.register_sdram(self.sdrphy,
                                 sdram_module.geom_settings,
                                 sdram_module.timing_settings)
+            if with_sdram_bist:
+                add_sdram_bist(self)
+            if with_sdram_stats:
+                add_sdram_stats(self)
 
 # Build ----------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on DE2-115")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
+    sdram_args(parser)
+    sdram_phase_args(parser)
     args = parser.parse_args()
 
-    soc = BaseSoC(**soc_sdram_argdict(args))
+    soc = BaseSoC(**soc_sdram_argdict(args), **sdram_argdict(args), **sdram_phase_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
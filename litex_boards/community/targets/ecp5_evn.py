@@ -14,6 +14,8 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+
 # CRG ----------------------------------------------------------------------------------------------
 
 class _CRG(Module):
@@ -60,6 +62,7 @@ def main():
     parser.add_argument("--gateware-toolchain", dest="toolchain", default="diamond",
         help='gateware toolchain to use, diamond (default) or  trellis')
     builder_args(parser)
+    build_cache_args(parser)
     soc_core_args(parser)
     parser.add_argument("--sys-clk-freq", default=60e6,
                         help="system clock frequency (default=60MHz)")
@@ -73,7 +76,7 @@ def main():
         x5_clk_freq=args.x5_clk_freq,
         **soc_core_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 if __name__ == "__main__":
     main()
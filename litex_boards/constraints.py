@@ -0,0 +1,59 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+from litex.build.generic_platform import ConstraintManager, ConstraintError
+
+# Indexed Constraint Manager -----------------------------------------------------------------------
+
+class IndexedConstraintManager(ConstraintManager):
+    """ConstraintManager serving request/lookup_request from (name, number) indexes.
+
+    The generic ConstraintManager scans the whole list of available/requested resources on each
+    request/lookup_request; on platforms with large _io tables this is done for each resource of
+    the design. The indexes are built once at construction and kept in sync with available/matched.
+    """
+    def __init__(self, io, connectors):
+        ConstraintManager.__init__(self, io, connectors)
+        self.available_index = {}
+        self.matched_index   = {}
+        for resource in self.available:
+            self.available_index.setdefault(resource[0], []).append(resource)
+
+    def add_extension(self, io):
+        ConstraintManager.add_extension(self, io)
+        for resource in io:
+            self.available_index.setdefault(resource[0], []).append(resource)
+
+    def lookup_available(self, name, number=None):
+        for resource in self.available_index.get(name, []):
+            if number is None or resource[1] == number:
+                return resource
+        raise ConstraintError("Resource not found: {}:{}".format(name, number))
+
+    def request(self, name, number=None):
+        resource = self.lookup_available(name, number)
+        # Let the generic request only see the resource found in the index.
+        available, self.available = self.available, [resource]
+        try:
+            obj = ConstraintManager.request(self, name, number)
+        finally:
+            self.available = available
+        self.available.remove(resource)
+        self.available_index[name].remove(resource)
+        self.matched_index.setdefault(name, []).append((resource, obj))
+        return obj
+
+    def lookup_request(self, name, number=None, loose=False):
+        subname = None
+        if ":" in name:
+            name, subname = name.split(":")
+        for resource, obj in self.matched_index.get(name, []):
+            if number is None or resource[1] == number:
+                if subname is not None:
+                    return getattr(obj, subname)
+                else:
+                    return obj
+        if loose:
+            return None
+        else:
+            raise ConstraintError("Resource not found: {}:{}".format(name, number))
@@ -0,0 +1,643 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+from migen import *
+
+from litex.soc.interconnect import stream
+from litex.soc.interconnect.csr import *
+from litex.soc.interconnect.csr_eventmanager import *
+
+from litedram.frontend.dma import LiteDRAMDMAReader, LiteDRAMDMAWriter
+
+from liteeth.common import eth_phy_description, convert_ip
+from liteeth.mac import LiteEthMAC
+from liteeth.mac.core import LiteEthMACCore
+from liteeth.core import LiteEthUDPIPCore
+from liteeth.frontend.etherbone import LiteEthEtherbone
+
+__all__ = [
+    "ethmac_slot_size", "add_ethmac",
+    "EthernetStats", "add_ethernet_stats",
+    "EthernetDMA", "add_ethernet_dma",
+    "add_udpip_core", "add_etherbone",
+    "UDPStreamer", "add_udp_streamer",
+    "add_ethernet",
+    "ethernet_args", "ethernet_argdict"
+]
+
+# MAC ----------------------------------------------------------------------------------------------
+
+# Size of the LiteEthMAC SRAM slots (MTU rounded up to a power of 2).
+ethmac_slot_size = 2048
+
+
+def add_ethmac(soc, phy, nrxslots=2, ntxslots=2, with_preamble_crc=True):
+    """Add a LiteEthMAC with its SRAM slots on the wishbone bus at soc.mem_map["ethmac"]
+
+    The RX slots are followed by the TX slots; the region is sized from the slot counts. Frames
+    received without a free RX slot are counted in the ethmac_sram_writer_errors CSR.
+    """
+    for n in [nrxslots, ntxslots, nrxslots + ntxslots]:
+        if n < 1 or 2**log2_int(n, need_pow2=False) != n:
+            raise ValueError("Ethernet slot counts and their sum must be powers of 2, not "
+                             "{} RX + {} TX slots".format(nrxslots, ntxslots))
+    size = (nrxslots + ntxslots)*ethmac_slot_size
+    soc.submodules.ethmac = LiteEthMAC(phy=phy, dw=32,
+        interface="wishbone", endianness=soc.cpu.endianness, with_preamble_crc=with_preamble_crc,
+        nrxslots=nrxslots, ntxslots=ntxslots)
+    soc.add_wb_slave(soc.mem_map["ethmac"], soc.ethmac.bus, size)
+    soc.add_memory_region("ethmac", soc.mem_map["ethmac"] | soc.shadow_base, size)
+    soc.add_csr("ethmac")
+    soc.add_interrupt("ethmac")
+    soc.add_constant("ETHMAC_RX_SLOTS", nrxslots)
+    soc.add_constant("ETHMAC_TX_SLOTS", ntxslots)
+
+# Statistics ---------------------------------------------------------------------------------------
+
+class EthernetStats(Module, AutoCSR):
+    """Frame counters on the user side of a LiteEthMACCore.
+
+    update latches the counters in their CSRs and reset clears them. rx_frames counts the frames
+    delivered by the MAC (before any drop for lack of buffer), rx_errors those flagged in error.
+    """
+    def __init__(self, core):
+        self.reset  = CSR()
+        self.update = CSR()
+        names = ["rx_frames", "rx_errors", "tx_frames"]
+        for name in names:
+            setattr(self, name, CSRStatus(32, name=name))
+
+        # # #
+
+        source = core.source
+        sink   = core.sink
+        counters = {name: Signal(32) for name in names}
+        increments = {
+            "rx_frames": source.valid & source.ready & source.last,
+            "rx_errors": source.valid & source.ready & source.last & (source.error != 0),
+            "tx_frames": sink.valid & sink.ready & sink.last,
+        }
+        self.sync += [
+            If(self.reset.re,
+                [counters[name].eq(0) for name in names]
+            ).Else(
+                [counters[name].eq(counters[name] + increments[name]) for name in names]
+            ),
+            If(self.update.re,
+                [getattr(self, name).status.eq(counters[name]) for name in names]
+            )
+        ]
+
+
+def add_ethernet_stats(soc, core):
+    """Add frame counters on a LiteEthMACCore to a SoC"""
+    soc.submodules.ethstats = EthernetStats(core)
+    soc.add_csr("ethstats")
+
+# DMA ----------------------------------------------------------------------------------------------
+
+class EthernetDMA(Module, AutoCSR):
+    """DMA of the frames of a LiteEthMACCore to/from slot rings in SDRAM.
+
+    Each ring is an array of nslots slots of slot_size bytes at base (byte offset in the SDRAM).
+    The first native word of a slot is its header (bits 0-15: length in bytes, bit 31: error),
+    the frame follows from the second native word.
+
+    RX: frames are written to the slot at rx_produce, the header last; rx_produce is incremented
+    once the slot is in SDRAM. Software consumes slots up to rx_produce and then sets rx_consume.
+    Frames are dropped (and counted in rx_drops) when the ring is full or the DMA is disabled.
+
+    TX: software fills the slots up to tx_produce; frames are read from the slot at tx_consume and
+    sent, tx_consume is incremented once the frame is sent.
+
+    Received frames are buffered in an rx_buffer_size bytes FIFO while waiting for the SDRAM; the
+    MAC is never stalled: frames arriving without room for a full slot are dropped (rx_drops).
+    rx_max_level is the highest number of slots waiting for software since enable was written.
+    """
+    def __init__(self, core, rx_port, tx_port, nrxslots=16, ntxslots=16, slot_size=2048,
+        rx_buffer_size=4096, endianness="big", fifo_depth=16):
+        dw         = len(core.source.data)
+        nbytes     = dw//8
+        port_bytes = rx_port.data_width//8
+        ratio      = rx_port.data_width//dw
+        slot_words = slot_size//port_bytes
+        assert tx_port.data_width == rx_port.data_width
+        assert ratio >= 1
+        assert slot_words >= 2
+        assert rx_buffer_size >= slot_size
+        for n in [nrxslots, ntxslots, slot_size, ratio]:
+            assert 2**log2_int(n, need_pow2=False) == n
+
+        self.enable       = CSRStorage()
+        self.rx_base      = CSRStorage(32)
+        self.rx_produce   = CSRStatus(log2_int(nrxslots))
+        self.rx_consume   = CSRStorage(log2_int(nrxslots))
+        self.rx_drops     = CSRStatus(32)
+        self.rx_max_level = CSRStatus(log2_int(nrxslots))
+        self.tx_base      = CSRStorage(32)
+        self.tx_produce   = CSRStorage(log2_int(ntxslots))
+        self.tx_consume   = CSRStatus(log2_int(ntxslots))
+
+        self.submodules.ev = EventManager()
+        self.ev.rx = EventSourceLevel()
+        self.ev.tx = EventSourcePulse()
+        self.ev.finalize()
+
+        # # #
+
+        def slot_address(base, slot):
+            return (base >> log2_int(port_bytes)) + (slot << log2_int(slot_words))
+
+        # (last_be, bytes) of the last word of a frame.
+        last_be_bytes = [(1 << (nbytes - n if endianness == "big" else n - 1), n)
+            for n in range(1, nbytes + 1)]
+
+        # RX ---------------------------------------------------------------------------------------
+
+        self.submodules.rx_dma  = rx_dma  = LiteDRAMDMAWriter(rx_port, fifo_depth)
+        self.submodules.rx_fifo = rx_fifo = stream.SyncFIFO(eth_phy_description(dw),
+            rx_buffer_size//nbytes, buffered=True)
+        source = rx_fifo.source
+
+        # Ingress: frames are only accepted with room for a full slot in the FIFO.
+        rx_drop   = Signal()
+        rx_sof    = Signal(reset=1)
+        rx_accept = Signal()
+        rx_room   = Signal()
+        self.comb += [
+            rx_room.eq(self.enable.storage &
+                (rx_fifo.level <= (rx_buffer_size - slot_size)//nbytes)),
+            core.source.connect(rx_fifo.sink, omit={"valid", "ready"}),
+            core.source.ready.eq(1),
+            rx_fifo.sink.valid.eq(core.source.valid & Mux(rx_sof, rx_room, rx_accept)),
+        ]
+        self.sync += If(core.source.valid,
+            rx_sof.eq(core.source.last),
+            If(rx_sof,
+                rx_accept.eq(rx_room)
+            )
+        )
+
+        rx_slot      = self.rx_produce.status
+        rx_next      = Signal(log2_int(nrxslots))
+        rx_address   = Signal(rx_port.address_width)
+        rx_offset    = Signal(max=slot_words + 1)
+        rx_lane      = Signal(max=max(ratio, 2))
+        rx_data      = Signal(rx_port.data_width)
+        rx_pending   = Signal()
+        rx_length    = Signal(16)
+        rx_error     = Signal()
+        rx_bytes     = Signal(max=nbytes + 1)
+        rx_submitted = Signal(16)
+        rx_written   = Signal(16)
+        rx_level     = Signal(log2_int(nrxslots))
+        rx_full      = Signal()
+        self.comb += [
+            rx_full.eq(~self.enable.storage | (rx_next == self.rx_consume.storage)),
+            rx_drop.eq(core.source.valid & rx_sof & ~rx_room),
+            rx_level.eq(rx_slot - self.rx_consume.storage),
+            rx_next.eq(rx_slot + 1),
+            rx_address.eq(slot_address(self.rx_base.storage, rx_slot)),
+            rx_bytes.eq(nbytes),
+            Case(source.last_be, {last_be: rx_bytes.eq(n) for last_be, n in last_be_bytes}),
+            self.ev.rx.trigger.eq(rx_slot != self.rx_consume.storage)
+        ]
+        self.sync += [
+            If(rx_dma.sink.valid & rx_dma.sink.ready,
+                rx_submitted.eq(rx_submitted + 1)
+            ),
+            If(rx_port.wdata.valid & rx_port.wdata.ready,
+                rx_written.eq(rx_written + 1)
+            ),
+            If(self.enable.re,
+                self.rx_max_level.status.eq(0)
+            ).Elif(rx_level > self.rx_max_level.status,
+                self.rx_max_level.status.eq(rx_level)
+            )
+        ]
+
+        def rx_shift(data):
+            return Cat(rx_data[dw:], data) if ratio > 1 else data
+
+        self.submodules.rx_fsm = rx_fsm = FSM(reset_state="IDLE")
+        rx_fsm.act("IDLE",
+            NextValue(rx_offset, 1),
+            NextValue(rx_lane, 0),
+            NextValue(rx_length, 0),
+            NextValue(rx_error, 0),
+            If(source.valid,
+                If(rx_full,
+                    NextState("DROP")
+                ).Else(
+                    NextState("PAYLOAD")
+                )
+            )
+        )
+        self.sync += self.rx_drops.status.eq(self.rx_drops.status + rx_drop +
+            (rx_fsm.ongoing("IDLE") & source.valid & rx_full))
+        rx_fsm.act("DROP",
+            source.ready.eq(1),
+            If(source.valid & source.last,
+                NextState("IDLE")
+            )
+        )
+        # Payload: words are packed in native words, written from the second word of the slot
+        # (words exceeding the slot are discarded and the frame flagged as error).
+        rx_word_done = Signal()
+        self.comb += rx_word_done.eq(rx_lane == (ratio - 1))
+        rx_fsm.act("PAYLOAD",
+            rx_dma.sink.valid.eq(rx_pending),
+            rx_dma.sink.address.eq(rx_address + rx_offset),
+            rx_dma.sink.data.eq(rx_data),
+            If(rx_dma.sink.valid & rx_dma.sink.ready,
+                NextValue(rx_pending, 0),
+                NextValue(rx_offset, rx_offset + 1)
+            ),
+            source.ready.eq(~rx_pending),
+            If(source.valid & ~rx_pending,
+                NextValue(rx_data, rx_shift(source.data)),
+                NextValue(rx_length, rx_length + Mux(source.last, rx_bytes, nbytes)),
+                NextValue(rx_error, rx_error | (source.error != 0)),
+                NextValue(rx_lane, rx_lane + 1),
+                If(rx_word_done,
+                    NextValue(rx_lane, 0),
+                    If(rx_offset < slot_words,
+                        NextValue(rx_pending, 1)
+                    ).Else(
+                        NextValue(rx_error, 1)
+                    )
+                ),
+                If(source.last,
+                    If(rx_word_done,
+                        NextState("HEADER")
+                    ).Else(
+                        NextState("PAD")
+                    )
+                )
+            )
+        )
+        # Pad: the last word of the frame is shifted to its lane.
+        rx_fsm.act("PAD",
+            NextValue(rx_data, rx_shift(0)),
+            NextValue(rx_lane, rx_lane + 1),
+            If(rx_word_done,
+                NextValue(rx_lane, 0),
+                If(rx_offset < slot_words,
+                    NextValue(rx_pending, 1)
+                ).Else(
+                    NextValue(rx_error, 1)
+                ),
+                NextState("HEADER")
+            )
+        )
+        # Header: written once the payload has been submitted.
+        rx_fsm.act("HEADER",
+            rx_dma.sink.valid.eq(1),
+            If(rx_pending,
+                rx_dma.sink.address.eq(rx_address + rx_offset),
+                rx_dma.sink.data.eq(rx_data),
+                If(rx_dma.sink.ready,
+                    NextValue(rx_pending, 0),
+                    NextValue(rx_offset, rx_offset + 1)
+                )
+            ).Else(
+                rx_dma.sink.address.eq(rx_address),
+                rx_dma.sink.data.eq(Cat(rx_length, Replicate(0, 15), rx_error)),
+                If(rx_dma.sink.ready,
+                    NextState("DRAIN")
+                )
+            )
+        )
+        # Drain: the slot is handed to software once all its words have been written.
+        rx_fsm.act("DRAIN",
+            If(rx_written == rx_submitted,
+                NextValue(rx_slot, rx_slot + 1),
+                NextState("IDLE")
+            )
+        )
+
+        # TX ---------------------------------------------------------------------------------------
+
+        self.submodules.tx_dma = tx_dma = LiteDRAMDMAReader(tx_port, fifo_depth)
+        sink = core.sink
+
+        tx_slot    = self.tx_consume.status
+        tx_address = Signal(tx_port.address_width)
+        tx_words   = Signal(max=slot_words + 1)
+        tx_issued  = Signal(max=slot_words + 1)
+        tx_lane    = Signal(max=max(ratio, 2))
+        tx_data    = Signal(tx_port.data_width)
+        tx_loaded  = Signal()
+        tx_length  = Signal(16)
+        tx_last_be = Signal(nbytes)
+        self.comb += [
+            tx_address.eq(slot_address(self.tx_base.storage, tx_slot)),
+            Case(tx_length, {n: tx_last_be.eq(last_be) for last_be, n in last_be_bytes}),
+        ]
+
+        self.submodules.tx_fsm = tx_fsm = FSM(reset_state="IDLE")
+        tx_fsm.act("IDLE",
+            If(self.enable.storage & (self.tx_produce.storage != tx_slot),
+                NextState("HEADER-CMD")
+            )
+        )
+        tx_fsm.act("HEADER-CMD",
+            tx_dma.sink.valid.eq(1),
+            tx_dma.sink.address.eq(tx_address),
+            If(tx_dma.sink.ready,
+                NextState("HEADER-DATA")
+            )
+        )
+        tx_header_length = tx_dma.source.data[:16]
+        tx_fsm.act("HEADER-DATA",
+            tx_dma.source.ready.eq(1),
+            If(tx_dma.source.valid,
+                NextValue(tx_length, tx_header_length),
+                NextValue(tx_words, (tx_header_length + port_bytes - 1) >> log2_int(port_bytes)),
+                NextValue(tx_issued, 0),
+                NextValue(tx_loaded, 0),
+                If((tx_header_length == 0) | (tx_header_length > (slot_size - port_bytes)),
+                    NextState("DONE")
+                ).Else(
+                    NextState("PAYLOAD")
+                )
+            )
+        )
+        tx_fsm.act("PAYLOAD",
+            # Read requests.
+            tx_dma.sink.valid.eq(tx_issued < tx_words),
+            tx_dma.sink.address.eq(tx_address + 1 + tx_issued),
+            If(tx_dma.sink.valid & tx_dma.sink.ready,
+                NextValue(tx_issued, tx_issued + 1)
+            ),
+            # Read data, unpacked to the MAC.
+            tx_dma.source.ready.eq(~tx_loaded),
+            If(tx_dma.source.valid & ~tx_loaded,
+                NextValue(tx_data, tx_dma.source.data),
+                NextValue(tx_loaded, 1)
+            ),
+            sink.valid.eq(tx_loaded),
+            sink.data.eq(tx_data[:dw]),
+            sink.last.eq(tx_length <= nbytes),
+            sink.last_be.eq(Mux(sink.last, tx_last_be, 0)),
+            If(sink.valid & sink.ready,
+                NextValue(tx_data, tx_data[dw:] if ratio > 1 else 0),
+                NextValue(tx_length, tx_length - nbytes),
+                NextValue(tx_lane, tx_lane + 1),
+                If((tx_lane == (ratio - 1)) | sink.last,
+                    NextValue(tx_lane, 0),
+                    NextValue(tx_loaded, 0)
+                ),
+                If(sink.last,
+                    NextState("DONE")
+                )
+            )
+        )
+        tx_fsm.act("DONE",
+            self.ev.tx.trigger.eq(1),
+            NextValue(tx_slot, tx_slot + 1),
+            NextState("IDLE")
+        )
+
+
+def add_ethernet_dma(soc, phy, nrxslots=16, ntxslots=16, slot_size=2048, rx_buffer_size=4096,
+    with_preamble_crc=True):
+    """Add a LiteEthMACCore with an EthernetDMA on the crossbar of the SDRAM of a SoCSDRAM"""
+    rx_port = soc.sdram.crossbar.get_port(mode="write")
+    tx_port = soc.sdram.crossbar.get_port(mode="read")
+    soc.submodules.ethcore = LiteEthMACCore(phy, 32,
+        endianness=soc.cpu.endianness, with_preamble_crc=with_preamble_crc)
+    soc.submodules.ethdma = EthernetDMA(soc.ethcore, rx_port, tx_port,
+        nrxslots       = nrxslots,
+        ntxslots       = ntxslots,
+        slot_size      = slot_size,
+        rx_buffer_size = rx_buffer_size,
+        endianness     = soc.cpu.endianness)
+    soc.add_csr("ethcore")
+    soc.add_csr("ethdma")
+    soc.add_interrupt("ethdma")
+    soc.add_constant("ETHDMA_NRXSLOTS", nrxslots)
+    soc.add_constant("ETHDMA_NTXSLOTS", ntxslots)
+    soc.add_constant("ETHDMA_SLOT_SIZE", slot_size)
+    soc.add_constant("ETHDMA_HEADER_SIZE", rx_port.data_width//8)
+
+
+# UDP/IP -------------------------------------------------------------------------------------------
+
+def add_udpip_core(soc, phy, mac_address=0x10e2d5000000, ip_address="192.168.1.50"):
+    """Add a hardware LiteEth UDP/IP stack (MAC, ARP, IP, ICMP, UDP) on phy to a SoC
+
+    The stack is shared: it is only created on the first call, its UDP crossbar serving the
+    hardware UDP users (Etherbone, streamers).
+    """
+    if not hasattr(soc, "ethcore"):
+        soc.submodules.ethcore = LiteEthUDPIPCore(phy, mac_address, convert_ip(ip_address),
+            soc.clk_freq)
+        soc.add_csr("ethcore")
+    return soc.ethcore
+
+
+def add_etherbone(soc, phy, mac_address=0x10e2d5000000, ip_address="192.168.1.50", udp_port=1234):
+    """Add an Etherbone wishbone master on a hardware UDP/IP stack to a SoC"""
+    udpip_core = add_udpip_core(soc, phy, mac_address, ip_address)
+    soc.submodules.etherbone = LiteEthEtherbone(udpip_core.udp, udp_port, mode="master")
+    soc.add_wb_master(soc.etherbone.wishbone.bus)
+
+# UDP Streamer -------------------------------------------------------------------------------------
+
+class UDPStreamer(Module, AutoCSR):
+    """Streams the words of sink as UDP packets of packet_size bytes to ip_address:udp_port.
+
+    sink is never stalled: words arriving with a full FIFO (or while disabled) are dropped and
+    counted in drops. A packet is only started once fully buffered, so packets are sent back to
+    back at the rate of the UDP/IP stack. packets counts the packets sent and packet_rate the
+    packets sent during the last second. With generate, sink is replaced by an incrementing counter
+    (test pattern at the stack rate).
+    """
+    def __init__(self, port, clk_freq, src_port=2000, ip_address="192.168.1.100", udp_port=2000,
+        packet_size=1024, fifo_depth=4096):
+        dw           = len(port.sink.data)
+        packet_words = packet_size//(dw//8)
+        assert fifo_depth >= packet_words
+        self.sink = sink = stream.Endpoint([("data", dw)])
+
+        self.enable      = CSRStorage()
+        self.generate    = CSRStorage()
+        self.ip_address  = CSRStorage(32, reset=convert_ip(ip_address))
+        self.udp_port    = CSRStorage(16, reset=udp_port)
+        self.packets     = CSRStatus(32)
+        self.packet_rate = CSRStatus(32)
+        self.drops       = CSRStatus(32)
+
+        # # #
+
+        # FIFO
+        self.submodules.fifo = fifo = stream.SyncFIFO([("data", dw)], fifo_depth, buffered=True)
+        counter = Signal(dw)
+        self.comb += [
+            sink.ready.eq(1),
+            If(self.generate.storage,
+                fifo.sink.valid.eq(self.enable.storage),
+                fifo.sink.data.eq(counter)
+            ).Else(
+                fifo.sink.valid.eq(self.enable.storage & sink.valid),
+                fifo.sink.data.eq(sink.data)
+            )
+        ]
+        self.sync += [
+            If(fifo.sink.valid & fifo.sink.ready,
+                counter.eq(counter + 1)
+            ),
+            If(~self.generate.storage & sink.valid & ~(fifo.sink.valid & fifo.sink.ready),
+                self.drops.status.eq(self.drops.status + 1)
+            )
+        ]
+
+        # Packetizer
+        sending = Signal()
+        count   = Signal(max=packet_words)
+        self.comb += [
+            port.source.ready.eq(1),
+            port.sink.valid.eq(sending & fifo.source.valid),
+            port.sink.last.eq(count == (packet_words - 1)),
+            port.sink.src_port.eq(src_port),
+            port.sink.dst_port.eq(self.udp_port.storage),
+            port.sink.ip_address.eq(self.ip_address.storage),
+            port.sink.length.eq(packet_size),
+            port.sink.data.eq(fifo.source.data),
+            fifo.source.ready.eq(sending & port.sink.ready)
+        ]
+        self.sync += [
+            If(~sending,
+                count.eq(0),
+                sending.eq(self.enable.storage & (fifo.level >= packet_words))
+            ).Elif(port.sink.valid & port.sink.ready,
+                count.eq(count + 1),
+                If(port.sink.last,
+                    sending.eq(0),
+                    self.packets.status.eq(self.packets.status + 1)
+                )
+            )
+        ]
+
+        # Packet rate
+        period  = Signal(max=int(clk_freq))
+        packets = Signal(32)
+        self.sync += [
+            period.eq(period + 1),
+            If(period == (int(clk_freq) - 1),
+                period.eq(0),
+                self.packet_rate.status.eq(packets),
+                packets.eq(0)
+            ).Elif(port.sink.valid & port.sink.ready & port.sink.last,
+                packets.eq(packets + 1)
+            )
+        ]
+
+
+def add_udp_streamer(soc, phy, mac_address=0x10e2d5000000, ip_address="192.168.1.50",
+    dst_ip_address="192.168.1.100", dst_udp_port=2000, udp_port=2000, packet_size=1024):
+    """Add a UDPStreamer on a hardware UDP/IP stack to a SoC (user data on soc.udp_streamer.sink)"""
+    udpip_core = add_udpip_core(soc, phy, mac_address, ip_address)
+    port = udpip_core.udp.crossbar.get_port(udp_port, dw=8)
+    soc.submodules.udp_streamer = UDPStreamer(port, soc.clk_freq,
+        src_port    = udp_port,
+        ip_address  = dst_ip_address,
+        udp_port    = dst_udp_port,
+        packet_size = packet_size)
+    soc.add_csr("udp_streamer")
+
+# Ethernet -----------------------------------------------------------------------------------------
+
+def add_ethernet(soc, phy, with_dma=False, nrxslots=None, ntxslots=None, slot_size=None,
+    rx_buffer_size=None, with_etherbone=False, with_udp_streamer=False,
+    mac_address=0x10e2d5000000, ip_address="192.168.1.50", udp_streamer_ip_address="192.168.1.100",
+    udp_streamer_port=2000):
+    """Add Ethernet to a SoC: LiteEthMAC SRAM slots, slot rings in SDRAM with_dma, or a hardware
+    UDP/IP stack with an Etherbone bridge and/or an UDP streamer (the PHY then has no CPU MAC)"""
+    if with_etherbone or with_udp_streamer:
+        if with_dma or any(v is not None for v in [nrxslots, ntxslots, slot_size, rx_buffer_size]):
+            raise ValueError("The hardware UDP/IP stack replaces the CPU MAC, its slots/DMA can't "
+                             "be configured")
+        if with_etherbone:
+            add_etherbone(soc, phy, mac_address, ip_address)
+        if with_udp_streamer:
+            add_udp_streamer(soc, phy, mac_address, ip_address,
+                dst_ip_address = udp_streamer_ip_address,
+                dst_udp_port   = udp_streamer_port)
+        add_ethernet_stats(soc, soc.ethcore.mac.core)
+    elif with_dma:
+        add_ethernet_dma(soc, phy,
+            nrxslots       = nrxslots or 16,
+            ntxslots       = ntxslots or 16,
+            slot_size      = slot_size or 2048,
+            rx_buffer_size = rx_buffer_size or 2*(slot_size or 2048))
+        add_ethernet_stats(soc, soc.ethcore)
+    else:
+        if slot_size not in [None, ethmac_slot_size] or rx_buffer_size is not None:
+            raise ValueError("LiteEthMAC slots are {} bytes, slot and RX buffer sizes only "
+                             "apply to the Ethernet DMA".format(ethmac_slot_size))
+        add_ethmac(soc, phy,
+            nrxslots = nrxslots or 2,
+            ntxslots = ntxslots or 2)
+        add_ethernet_stats(soc, soc.ethmac.core)
+
+# Arguments ----------------------------------------------------------------------------------------
+
+def ethernet_args(parser):
+    parser.add_argument("--with-ethernet", action="store_true",
+                        help="enable Ethernet support")
+    parser.add_argument("--with-ethernet-dma", action="store_true",
+                        help="use DMA to/from slot rings in SDRAM instead of the MAC SRAM slots "
+                             "(with --with-ethernet)")
+    parser.add_argument("--ethernet-rx-slots", default=None, type=int,
+                        help="number of Ethernet RX slots, power of 2 and RX + TX slots power of "
+                             "2 without DMA (default=2, 16 with DMA; BIOS netboot requires 2)")
+    parser.add_argument("--ethernet-tx-slots", default=None, type=int,
+                        help="number of Ethernet TX slots, power of 2 and RX + TX slots power of "
+                             "2 without DMA (default=2, 16 with DMA)")
+    parser.add_argument("--ethernet-slot-size", default=None, type=int,
+                        help="size of the Ethernet DMA slots in bytes (default=2048)")
+    parser.add_argument("--ethernet-rx-buffer-size", default=None, type=int,
+                        help="size of the Ethernet DMA RX FIFO in bytes (default=2 slots)")
+    parser.add_argument("--with-etherbone", action="store_true",
+                        help="enable Etherbone (hardware UDP/IP wishbone bridge, UDP port 1234) "
+                             "instead of the CPU MAC")
+    parser.add_argument("--with-udp-streamer", action="store_true",
+                        help="enable UDP streaming of user data (hardware UDP/IP stack) instead of "
+                             "the CPU MAC")
+    parser.add_argument("--udp-streamer-ip-address", default="192.168.1.100",
+                        help="default destination IP address of the UDP streamer "
+                             "(default=192.168.1.100)")
+    parser.add_argument("--udp-streamer-port", default=2000, type=int,
+                        help="default destination UDP port of the UDP streamer (default=2000)")
+    parser.add_argument("--ethernet-mac-address", default=0x10e2d5000000, type=lambda x: int(x, 0),
+                        help="MAC address of the hardware UDP/IP stack (default=0x10e2d5000000)")
+    parser.add_argument("--ethernet-ip-address", default="192.168.1.50",
+                        help="IP address of the hardware UDP/IP stack (default=192.168.1.50)")
+
+
+def ethernet_argdict(args):
+    if not (args.with_ethernet or args.with_etherbone or args.with_udp_streamer):
+        options = [args.with_ethernet_dma, args.ethernet_rx_slots, args.ethernet_tx_slots,
+            args.ethernet_slot_size, args.ethernet_rx_buffer_size]
+        if any(option not in [None, False] for option in options):
+            raise ValueError("--with-ethernet-dma and the Ethernet slot/buffer options require "
+                             "--with-ethernet")
+        return {}
+    # EthernetSoC arguments: ethernet_kwargs are passed through to add_ethernet.
+    return {
+        "ethernet_kwargs": {
+            "with_dma":                args.with_ethernet_dma,
+            "nrxslots":                args.ethernet_rx_slots,
+            "ntxslots":                args.ethernet_tx_slots,
+            "slot_size":               args.ethernet_slot_size,
+            "rx_buffer_size":          args.ethernet_rx_buffer_size,
+            "with_etherbone":          args.with_etherbone,
+            "with_udp_streamer":       args.with_udp_streamer,
+            "udp_streamer_ip_address": args.udp_streamer_ip_address,
+            "udp_streamer_port":       args.udp_streamer_port,
+            "mac_address":             args.ethernet_mac_address,
+            "ip_address":              args.ethernet_ip_address,
+        }
+    }
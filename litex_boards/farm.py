@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+import argparse
+import importlib
+import subprocess
+
+# Toolchains ---------------------------------------------------------------------------------------
+
+# Gateware toolchain used by each board (target or platform name).
+toolchains = {
+    # Xilinx / Vivado
+    "ac701":        "vivado",
+    "arty":         "vivado",
+    "genesys2":     "vivado",
+    "kc705":        "vivado",
+    "kcu105":       "vivado",
+    "netv2":        "vivado",
+    "nexys4ddr":    "vivado",
+    "nexys_video":  "vivado",
+    # Xilinx / ISE
+    "minispartan6": "ise",
+    "sp605":        "ise",
+    # Intel / Quartus
+    "de0nano":      "quartus",
+    "de10lite":     "quartus",
+    "de1soc":       "quartus",
+    "de2_115":      "quartus",
+    # Lattice / Diamond (or Trellis with --gateware-toolchain=trellis)
+    "ecp5_evn":     "diamond",
+    "machxo3":      "diamond",
+    "trellisboard": "diamond",
+    "ulx3s":        "diamond",
+    "versa_ecp3":   "diamond",
+    "versa_ecp5":   "diamond",
+    # Lattice / IceStorm
+    "fomu_evt":     "icestorm",
+    "fomu_hacker":  "icestorm",
+    "fomu_pvt":     "icestorm",
+    "tinyfpga_bx":  "icestorm",
+    # Microsemi / Libero
+    "avalanche":    "libero",
+}
+
+# Concurrent builds allowed per toolchain by default (vendor toolchains are memory hungry).
+default_slots = {
+    "vivado":   1,
+    "ise":      1,
+    "quartus":  1,
+    "diamond":  1,
+    "libero":   1,
+}
+
+# Build --------------------------------------------------------------------------------------------
+
+def target_module(target):
+    """Full module name of a target, without importing it"""
+    for package in ["litex_boards.community.targets",
+                    "litex_boards.partner.targets",
+                    "litex_boards.official.targets"]:
+        if target in importlib.import_module(package).__all__:
+            return package + "." + target
+    raise ValueError("Unknown target: {}".format(target))
+
+
+class Build:
+    def __init__(self, target, soc="BaseSoC", options=[], output_dir="build", cmd=None):
+        self.target  = target
+        self.soc     = soc
+        self.options = list(options)
+        self.base_output_dir = output_dir
+        self.set_name("_".join([target, soc.lower()] + [option.strip("-") for option in options]))
+        self.toolchain  = self.get_toolchain()
+        self.cmd        = cmd
+        self.returncode = None
+        self.duration   = None
+
+    def set_name(self, name):
+        # Names are used as directory names: only keep word characters.
+        self.name       = re.sub(r"\W", "_", name)
+        self.output_dir = os.path.join(self.base_output_dir, self.name)
+
+    def get_toolchain(self):
+        board = self.target
+        for option in self.options:
+            if option.startswith("--gateware-toolchain="):
+                return option.split("=", 1)[1]
+        for option in self.options:
+            if option.startswith("litex_boards."): # Platform of the simple target.
+                board = option.split(".")[-1]
+        return toolchains.get(board, "unknown")
+
+    def get_cmd(self):
+        if self.cmd is not None:
+            return self.cmd
+        cmd = [sys.executable, "-m", target_module(self.target), "--output-dir", self.output_dir]
+        if self.soc == "EthernetSoC":
+            cmd += ["--with-ethernet"]
+        elif self.soc != "BaseSoC":
+            raise ValueError("Unknown SoC: {}".format(self.soc))
+        return cmd + self.options
+
+
+def unique_names(builds):
+    """Suffix the names (and output directories) of the builds sharing the same name"""
+    count = {}
+    for build in builds:
+        count[build.name] = count.get(build.name, 0) + 1
+    index = {}
+    for build in builds:
+        if count[build.name] > 1:
+            name = build.name
+            index[name] = index.get(name, 0) + 1
+            build.set_name("{}_{}".format(name, index[name] - 1))
+
+# Scheduler ----------------------------------------------------------------------------------------
+
+class Scheduler:
+    """Runs builds over local cores, with a number of concurrent builds per toolchain.
+
+    Builds are started in order as soon as both a job and a slot of their toolchain are free, so
+    a build waiting for a busy toolchain does not hold a job that another toolchain could use.
+    Builds sharing the same name are given distinct output directories. On KeyboardInterrupt, the
+    running builds (and the toolchain processes they started) are terminated.
+    """
+    def __init__(self, jobs=None, slots={}, poll_period=0.1):
+        self.jobs        = jobs or os.cpu_count() or 1
+        self.slots       = dict(default_slots, **slots)
+        self.poll_period = poll_period
+
+    def start(self, build):
+        os.makedirs(build.output_dir, exist_ok=True)
+        log = open(os.path.join(build.output_dir, "build.log"), "w")
+        build.start = time.time()
+        try:
+            # Own process group: the toolchain processes of the build can be terminated with it.
+            build.process = subprocess.Popen(build.get_cmd(),
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        finally:
+            log.close()
+        print("[{:7.1f}s] started  {} ({})".format(build.start - self.t0, build.name, build.toolchain))
+
+    def terminate(self, build):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(build.process.pid, signal.SIGTERM)
+            else:
+                build.process.terminate()
+        except OSError: # Already exited.
+            pass
+        build.returncode = build.process.wait()
+
+    def run(self, builds):
+        unique_names(builds)
+        self.t0 = time.time()
+        self.running = []
+        try:
+            return self.schedule(builds)
+        except KeyboardInterrupt:
+            for build in self.running:
+                self.terminate(build)
+                print("[{:7.1f}s] killed   {}".format(time.time() - self.t0, build.name))
+            raise
+
+    def schedule(self, builds):
+        pending = list(builds)
+        running = self.running
+        used    = {}
+        while pending or running:
+            for build in list(pending):
+                if len(running) >= self.jobs:
+                    break
+                if used.get(build.toolchain, 0) < self.slots.get(build.toolchain, self.jobs):
+                    used[build.toolchain] = used.get(build.toolchain, 0) + 1
+                    pending.remove(build)
+                    self.start(build)
+                    running.append(build)
+            time.sleep(self.poll_period)
+            for build in list(running):
+                if build.process.poll() is not None:
+                    build.returncode = build.process.returncode
+                    build.duration   = time.time() - build.start
+                    used[build.toolchain] -= 1
+                    running.remove(build)
+                    print("[{:7.1f}s] finished {} ({})".format(time.time() - self.t0, build.name,
+                        "OK" if build.returncode == 0 else "FAIL"))
+        return builds
+
+# Matrix -------------------------------------------------------------------------------------------
+
+def parse_matrix(filename, output_dir):
+    """Builds of a JSON matrix: [{"target": "arty", "soc": "EthernetSoC", "options": [...]}, ...]"""
+    with open(filename) as f:
+        matrix = json.load(f)
+    return [Build(entry["target"], entry.get("soc", "BaseSoC"), entry.get("options", []), output_dir)
+        for entry in matrix]
+
+
+def parse_slots(slots):
+    """Slots from a "vivado=2,quartus=1" string"""
+    r = {}
+    for slot in slots.split(",") if slots else []:
+        toolchain, n = slot.split("=")
+        r[toolchain] = int(n)
+    return r
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX-Boards build farm")
+    parser.add_argument("--matrix", default=None,
+                        help="JSON build matrix ([{\"target\": ..., \"soc\": ..., \"options\": [...]}])")
+    parser.add_argument("--output-dir", default="build/farm",
+                        help="base output directory of the builds (default=build/farm)")
+    parser.add_argument("--jobs", default=None, type=int,
+                        help="maximum number of concurrent builds (default=number of cores)")
+    parser.add_argument("--slots", default=None,
+                        help="concurrent builds per toolchain, ex: vivado=2,quartus=1 (default=1 for "
+                             "vendor toolchains, --jobs for open source toolchains)")
+    parser.add_argument("builds", nargs="*",
+                        help="builds to add to the matrix, as target[:soc] (ex: arty:EthernetSoC)")
+    args = parser.parse_args()
+
+    builds = []
+    if args.matrix is not None:
+        builds += parse_matrix(args.matrix, args.output_dir)
+    for build in args.builds:
+        target, _, soc = build.partition(":")
+        builds.append(Build(target, soc or "BaseSoC", output_dir=args.output_dir))
+    if not builds:
+        parser.error("no build to run")
+
+    scheduler = Scheduler(jobs=args.jobs, slots=parse_slots(args.slots))
+    scheduler.run(builds)
+
+    for build in builds:
+        print("{:48s} {:10s} {:4s} {:8.1f}s".format(build.name, build.toolchain,
+            "OK" if build.returncode == 0 else "FAIL", build.duration))
+    if any(build.returncode != 0 for build in builds):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
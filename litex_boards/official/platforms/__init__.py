@@ -1,12 +1,16 @@
-from litex_boards.official.platforms import arty
-from litex_boards.official.platforms import avalanche
-from litex_boards.official.platforms import de0nano
-from litex_boards.official.platforms import genesys2
-from litex_boards.official.platforms import kc705
-from litex_boards.official.platforms import kcu105
-from litex_boards.official.platforms import machxo3
-from litex_boards.official.platforms import minispartan6
-from litex_boards.official.platforms import nexys4ddr
-from litex_boards.official.platforms import nexys_video
-from litex_boards.official.platforms import versa_ecp3
-from litex_boards.official.platforms import versa_ecp5
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "arty",
+    "avalanche",
+    "de0nano",
+    "genesys2",
+    "kc705",
+    "kcu105",
+    "machxo3",
+    "minispartan6",
+    "nexys4ddr",
+    "nexys_video",
+    "versa_ecp3",
+    "versa_ecp5",
+])
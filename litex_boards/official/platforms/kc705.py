@@ -5,6 +5,8 @@
 from litex.build.generic_platform import *
 from litex.build.xilinx import XilinxPlatform, VivadoProgrammer
 
+from litex_boards.constraints import IndexedConstraintManager
+
 # IOs ----------------------------------------------------------------------------------------------
 
 _io = [
@@ -535,6 +537,7 @@ class Platform(XilinxPlatform):
 
     def __init__(self):
         XilinxPlatform.__init__(self, "xc7k325t-ffg900-2", _io, _connectors, toolchain="vivado")
+        self.constraint_manager = IndexedConstraintManager(_io, _connectors)
         self.add_platform_command("""
 set_property CFGBVS VCCO [current_design]
 set_property CONFIG_VOLTAGE 2.5 [current_design]
@@ -4,6 +4,8 @@
 from litex.build.generic_platform import *
 from litex.build.xilinx import XilinxPlatform, VivadoProgrammer
 
+from litex_boards.constraints import IndexedConstraintManager
+
 # IOs ----------------------------------------------------------------------------------------------
 
 _io = [
@@ -490,6 +492,7 @@ class Platform(XilinxPlatform):
 
     def __init__(self):
         XilinxPlatform.__init__(self, "xcku040-ffva1156-2-e", _io, _connectors, toolchain="vivado")
+        self.constraint_manager = IndexedConstraintManager(_io, _connectors)
 
     def create_programmer(self):
         return VivadoProgrammer()
@@ -1,10 +1,14 @@
-from litex_boards.official.targets import arty
-from litex_boards.official.targets import de0nano
-from litex_boards.official.targets import genesys2
-from litex_boards.official.targets import kc705
-from litex_boards.official.targets import kcu105
-from litex_boards.official.targets import minispartan6
-from litex_boards.official.targets import nexys4ddr
-from litex_boards.official.targets import nexys_video
-from litex_boards.official.targets import simple
-from litex_boards.official.targets import versa_ecp5
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "arty",
+    "de0nano",
+    "genesys2",
+    "kc705",
+    "kcu105",
+    "minispartan6",
+    "nexys4ddr",
+    "nexys_video",
+    "simple",
+    "versa_ecp5",
+])
@@ -13,11 +13,14 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+from litex_boards.ethernet import *
+
 from litedram.modules import MT41K128M16
 from litedram.phy import s7ddrphy
 
 from liteeth.phy.mii import LiteEthPHYMII
-from liteeth.mac import LiteEthMAC
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -51,7 +54,8 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(100e6), **kwargs):
+    def __init__(self, sys_clk_freq=int(100e6),
+        with_sdram_bist=False, with_sdram_stats=False, **kwargs):
         platform = arty.Platform()
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                          integrated_rom_size=0x8000,
@@ -64,9 +68,14 @@ class BaseSoC(SoCSDRAM):
         self.submodules.ddrphy = s7ddrphy.A7DDRPHY(platform.request("ddram"), sys_clk_freq=sys_clk_freq)
         self.add_csr("ddrphy")
         sdram_module = MT41K128M16(sys_clk_freq, "1:4")
+        check_l2_size(self.l2_size, self.ddrphy, sdram_module)
         self.register_sdram(self.ddrphy,
                             sdram_module.geom_settings,
                             sdram_module.timing_settings)
+        if with_sdram_bist:
+            add_sdram_bist(self)
+        if with_sdram_stats:
+            add_sdram_stats(self)
 
 # EthernetSoC --------------------------------------------------------------------------------------
 
@@ -76,18 +85,13 @@ class EthernetSoC(BaseSoC):
     }
     mem_map.update(BaseSoC.mem_map)
 
-    def __init__(self, **kwargs):
+    def __init__(self, ethernet_kwargs=None, **kwargs):
         BaseSoC.__init__(self, **kwargs)
 
         self.submodules.ethphy = LiteEthPHYMII(self.platform.request("eth_clocks"),
                                                self.platform.request("eth"))
         self.add_csr("ethphy")
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness)
-        self.add_wb_slave(self.mem_map["ethmac"], self.ethmac.bus, 0x2000)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethernet(self, self.ethphy, **(ethernet_kwargs or {}))
 
         self.ethphy.crg.cd_eth_rx.clk.attr.add("keep")
         self.ethphy.crg.cd_eth_tx.clk.attr.add("keep")
@@ -104,15 +108,16 @@ class EthernetSoC(BaseSoC):
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on Arty")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
-    parser.add_argument("--with-ethernet", action="store_true",
-                        help="enable Ethernet support")
+    sdram_args(parser)
+    ethernet_args(parser)
     args = parser.parse_args()
 
-    cls = EthernetSoC if args.with_ethernet else BaseSoC
-    soc = cls(**soc_sdram_argdict(args))
+    cls = EthernetSoC if ethernet_argdict(args) else BaseSoC
+    soc = cls(**soc_sdram_argdict(args), **sdram_argdict(args), **ethernet_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
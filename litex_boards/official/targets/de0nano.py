@@ -4,6 +4,7 @@
 # License: BSD
 
 import argparse
+from math import gcd
 
 from migen import *
 
@@ -12,13 +13,16 @@ from litex_boards.platforms import de0nano
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+
 from litedram.modules import IS42S16160
 from litedram.phy import GENSDRPHY
 
 # CRG ----------------------------------------------------------------------------------------------
 
 class _CRG(Module):
-    def __init__(self, platform):
+    def __init__(self, platform, sys_clk_freq, sdram_phase=None):
         self.clock_domains.cd_sys = ClockDomain()
         self.clock_domains.cd_sys_ps = ClockDomain()
         self.clock_domains.cd_por = ClockDomain(reset_less=True)
@@ -29,69 +33,157 @@ class _CRG(Module):
         self.cd_sys_ps.clk.attr.add("keep")
         self.cd_por.clk.attr.add("keep")
 
-        # power on rst
+        # power on rst (from the 50MHz oscillator, also used as pll scan clock)
+        clk50 = platform.request("clk50")
         rst_n = Signal()
+        locked = Signal()
         self.sync.por += rst_n.eq(1)
         self.comb += [
-            self.cd_por.clk.eq(self.cd_sys.clk),
-            self.cd_sys.rst.eq(~rst_n),
-            self.cd_sys_ps.rst.eq(~rst_n)
+            self.cd_por.clk.eq(clk50),
+            self.cd_sys.rst.eq(~rst_n | ~locked),
+            self.cd_sys_ps.rst.eq(~rst_n | ~locked)
         ]
 
         # sys clk / sdram clk
-        clk50 = platform.request("clk50")
-        self.comb += self.cd_sys.clk.eq(clk50)
+        multiply_by, divide_by, _ = _altpll_config(50e6, sys_clk_freq)
+        # sdram clk phase: -3000ps hand-tuned at 50MHz, kept in degrees at other frequencies
+        phase_shift = -int(3000*50e6/sys_clk_freq)
+        clks = Signal(5)
         self.specials += \
             Instance("ALTPLL",
                 p_BANDWIDTH_TYPE="AUTO",
-                p_CLK0_DIVIDE_BY=1,
+                p_CLK0_DIVIDE_BY=divide_by,
                 p_CLK0_DUTY_CYCLE=50,
-                p_CLK0_MULTIPLY_BY=1,
-                p_CLK0_PHASE_SHIFT="-3000",
+                p_CLK0_MULTIPLY_BY=multiply_by,
+                p_CLK0_PHASE_SHIFT="0",
+                p_CLK1_DIVIDE_BY=divide_by,
+                p_CLK1_DUTY_CYCLE=50,
+                p_CLK1_MULTIPLY_BY=multiply_by,
+                p_CLK1_PHASE_SHIFT=str(phase_shift),
                 p_COMPENSATE_CLOCK="CLK0",
                 p_INCLK0_INPUT_FREQUENCY=20000,
-                p_OPERATION_MODE="ZERO_DELAY_BUFFER",
+                p_OPERATION_MODE="NORMAL",
                 i_INCLK=clk50,
-                o_CLK=self.cd_sys_ps.clk,
+                o_CLK=clks,
+                o_LOCKED=locked,
                 i_ARESET=~rst_n,
                 i_CLKENA=0x3f,
                 i_EXTCLKENA=0xf,
                 i_FBIN=1,
                 i_PFDENA=1,
                 i_PLLENA=1,
+                **altpll_phase_params(sdram_phase, clkout=1, clock_domain="por")
             )
+        self.comb += [
+            self.cd_sys.clk.eq(clks[0]),
+            self.cd_sys_ps.clk.eq(clks[1])
+        ]
         self.comb += platform.request("sdram_clock").eq(self.cd_sys_ps.clk)
 
+# SDRAM --------------------------------------------------------------------------------------------
+
+# Minimum clock period of the IS42S16160B-7 per CAS latency.
+_is42s16160_tck = {
+    2: 10e-9,
+    3: 7e-9,
+}
+
+
+def _is42s16160_cl(sys_clk_freq):
+    for cl, tck in sorted(_is42s16160_tck.items()):
+        if 1/sys_clk_freq >= tck*(1 - 1e-6):
+            return cl
+    raise ValueError("IS42S16160 is rated up to {:3.2f}MHz".format(1e-6/min(_is42s16160_tck.values())))
+
+
+# Cyclone IV E PLL limits: PFD (clkin/N) and VCO (clkin*M/N) frequencies, M/N/C counters.
+_altpll_pfd_range = (5e6, 325e6)
+_altpll_vco_range = (600e6, 1300e6)
+_altpll_max_value = 512
+
+
+def _altpll_config(clkin_freq, clkout_freq):
+    """(multiply_by, divide_by, vco_freq) generating clkout_freq exactly from clkin_freq.
+
+    Quartus selects the highest VCO frequency possible for the ratio, so the PFD/VCO/counter
+    limits are checked here and the VCO frequency is returned (dynamic phase steps are 1/8 of its
+    period).
+    """
+    clkin_freq, clkout_freq = int(clkin_freq), int(clkout_freq)
+    config = None
+    for n in range(1, _altpll_max_value + 1):
+        pfd_freq = clkin_freq/n
+        if not (_altpll_pfd_range[0] <= pfd_freq <= _altpll_pfd_range[1]):
+            continue
+        m_min = max(1, -(-int(_altpll_vco_range[0])*n//clkin_freq))
+        m_max = min(_altpll_max_value, int(_altpll_vco_range[1])*n//clkin_freq)
+        for m in range(m_min, m_max + 1):
+            # vco = clkin*m/n = clkout*c
+            if (clkin_freq*m) % (clkout_freq*n):
+                continue
+            c = clkin_freq*m//(clkout_freq*n)
+            vco_freq = clkin_freq*m/n
+            if c <= _altpll_max_value and (config is None or vco_freq > config[2]):
+                config = (m, n*c, vco_freq)
+    if config is None:
+        raise ValueError("No ALTPLL config for {:3.2f}MHz from {:3.2f}MHz".format(
+            clkout_freq/1e6, clkin_freq/1e6))
+    multiply_by, divide_by, vco_freq = config
+    d = gcd(multiply_by, divide_by)
+    return multiply_by//d, divide_by//d, vco_freq
+
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(50e6), **kwargs):
-        assert sys_clk_freq == int(50e6)
+    mem_map = {
+        "sdram_phase_ram": 0x20000000,  # (shadow @0xa0000000)
+    }
+    mem_map.update(SoCSDRAM.mem_map)
+
+    def __init__(self, sys_clk_freq=int(50e6),
+        with_sdram_bist=False, with_sdram_stats=False, with_sdram_phase=False, **kwargs):
         platform = de0nano.Platform()
+        sdram_cl = _is42s16160_cl(sys_clk_freq)
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                           integrated_rom_size=0x8000,
                           **kwargs)
 
-        self.submodules.crg = _CRG(platform)
+        sdram_phase = None
+        if with_sdram_phase:
+            # steps scanned by the calibration: one sys period (VCO/sys counter, 8 steps per period)
+            _, _, vco_freq = _altpll_config(50e6, sys_clk_freq)
+            sdram_phase = add_sdram_phase(self, 8*int(vco_freq//sys_clk_freq), clock_domain="por")
+        self.submodules.crg = _CRG(platform, sys_clk_freq, sdram_phase)
 
         if not self.integrated_main_ram_size:
-            self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"))
+            self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"), cl=sdram_cl)
             sdram_module = IS42S16160(self.clk_freq, "1:1")
+            check_l2_size(self.l2_size, self.sdrphy, sdram_module)
             self.register_sdram(self.sdrphy,
                                 sdram_module.geom_settings,
                                 sdram_module.timing_settings)
+            if with_sdram_bist:
+                add_sdram_bist(self)
+            if with_sdram_stats:
+                add_sdram_stats(self)
 
 # Build --------------------------------------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on DE0 Nano")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
+    sdram_args(parser)
+    sdram_phase_args(parser)
+    parser.add_argument("--sys-clk-freq", default=50e6,
+                        help="system clock frequency (default=50MHz, up to 142MHz with the IS42S16160-7)")
     args = parser.parse_args()
 
-    soc = BaseSoC(**soc_sdram_argdict(args))
+    soc = BaseSoC(sys_clk_freq=int(float(args.sys_clk_freq)),
+        **soc_sdram_argdict(args), **sdram_argdict(args), **sdram_phase_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
@@ -13,11 +13,14 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+from litex_boards.ethernet import *
+
 from litedram.modules import MT41J256M16
 from litedram.phy import s7ddrphy
 
 from liteeth.phy.s7rgmii import LiteEthPHYRGMII
-from liteeth.mac import LiteEthMAC
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -44,7 +47,9 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(125e6), **kwargs):
+    def __init__(self, sys_clk_freq=int(125e6), with_sdram_bist=False, with_sdram_stats=False,
+        sdram_dma_channels=0, sdram_dma_data_width=None, sdram_dma_clock_domain="sys",
+        sdram_dma_loopback=False, **kwargs):
         platform = genesys2.Platform()
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                          integrated_rom_size=0x8000,
@@ -57,9 +62,17 @@ class BaseSoC(SoCSDRAM):
         self.submodules.ddrphy = s7ddrphy.K7DDRPHY(platform.request("ddram"), sys_clk_freq=sys_clk_freq)
         self.add_csr("ddrphy")
         sdram_module = MT41J256M16(self.clk_freq, "1:4")
+        check_l2_size(self.l2_size, self.ddrphy, sdram_module)
         self.register_sdram(self.ddrphy,
                             sdram_module.geom_settings,
                             sdram_module.timing_settings)
+        if with_sdram_bist:
+            add_sdram_bist(self)
+        if with_sdram_stats:
+            add_sdram_stats(self)
+        if sdram_dma_channels:
+            add_sdram_dma(self, sdram_dma_channels, sdram_dma_data_width, sdram_dma_clock_domain,
+                sdram_dma_loopback)
 
 # EthernetSoC ------------------------------------------------------------------------------------------
 
@@ -69,18 +82,13 @@ class EthernetSoC(BaseSoC):
     }
     mem_map.update(BaseSoC.mem_map)
 
-    def __init__(self, **kwargs):
+    def __init__(self, ethernet_kwargs=None, **kwargs):
         BaseSoC.__init__(self, **kwargs)
 
         self.submodules.ethphy = LiteEthPHYRGMII(self.platform.request("eth_clocks"),
                                                  self.platform.request("eth"))
         self.add_csr("ethphy")
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness)
-        self.add_wb_slave(self.mem_map["ethmac"], self.ethmac.bus, 0x2000)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethernet(self, self.ethphy, **(ethernet_kwargs or {}))
 
         self.ethphy.crg.cd_eth_rx.clk.attr.add("keep")
         self.ethphy.crg.cd_eth_tx.clk.attr.add("keep")
@@ -96,15 +104,18 @@ class EthernetSoC(BaseSoC):
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on Genesys2")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
-    parser.add_argument("--with-ethernet", action="store_true",
-                        help="enable Ethernet support")
+    sdram_args(parser)
+    sdram_dma_args(parser)
+    ethernet_args(parser)
     args = parser.parse_args()
 
-    cls = EthernetSoC if args.with_ethernet else BaseSoC
-    soc = cls(**soc_sdram_argdict(args))
+    cls = EthernetSoC if ethernet_argdict(args) else BaseSoC
+    soc = cls(**soc_sdram_argdict(args), **sdram_argdict(args),
+        **sdram_dma_argdict(args), **ethernet_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@
 # License: BSD
 
 import argparse
+from math import ceil
 
 from migen import *
 
@@ -13,11 +14,18 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+from litex_boards.ethernet import *
+
 from litedram.modules import EDY4016A
 from litedram.phy import usddrphy
 
 from liteeth.phy.ku_1000basex import KU_1000BASEX
-from liteeth.mac import LiteEthMAC
+
+# IDELAYCTRL reset pulse width and settling time after RDY before releasing sys.
+ic_reset_time  = 320e-9
+ic_settle_time = 500e-9
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -40,6 +48,7 @@ class _CRG(Module):
         pll.create_clkout(self.cd_pll4x, sys_clk_freq*4, buf=None, with_reset=False)
         pll.create_clkout(self.cd_clk200, 200e6, with_reset=False)
 
+        # sys4x / sys (1:4 PHY ratio)
         self.specials += [
             Instance("BUFGCE_DIV", name="main_bufgce_div",
                 p_BUFGCE_DIVIDE=4,
@@ -49,7 +58,11 @@ class _CRG(Module):
             AsyncResetSynchronizer(self.cd_clk200, ~pll.locked),
         ]
 
-        ic_reset_counter = Signal(max=64, reset=63)
+        # idelayctrl: reset for ic_reset_time once clk200 is stable, then keep sys in reset for
+        # ic_settle_time after rdy
+        ic_reset_cycles = ceil(ic_reset_time*200e6)
+        ic_rdy_cycles   = ceil(ic_settle_time*sys_clk_freq)
+        ic_reset_counter = Signal(max=ic_reset_cycles + 1, reset=ic_reset_cycles)
         ic_reset = Signal(reset=1)
         self.sync.clk200 += \
             If(ic_reset_counter != 0,
@@ -58,7 +71,7 @@ class _CRG(Module):
                 ic_reset.eq(0)
             )
         ic_rdy = Signal()
-        ic_rdy_counter = Signal(max=64, reset=63)
+        ic_rdy_counter = Signal(max=ic_rdy_cycles + 1, reset=ic_rdy_cycles)
         self.cd_sys.rst.reset = 1
         self.comb += self.cd_ic.clk.eq(self.cd_sys.clk)
         self.sync.ic += [
@@ -80,8 +93,13 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(125e6), **kwargs):
+    def __init__(self, sys_clk_freq=int(125e6), with_sdram_bist=False, with_sdram_stats=False,
+        sdram_dma_channels=0, sdram_dma_data_width=None, sdram_dma_clock_domain="sys",
+        sdram_dma_loopback=False, **kwargs):
         platform = kcu105.Platform()
+        if sys_clk_freq == "max":
+            sys_clk_freq = usddrphy_max_sys_clk_freq(platform.device, 125e6, EDY4016A)
+        sdram_module = usddrphy_module(platform.device, 125e6, sys_clk_freq, EDY4016A)
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                          integrated_rom_size=0x8000,
                          integrated_sram_size=0x8000,
@@ -93,10 +111,17 @@ class BaseSoC(SoCSDRAM):
         self.submodules.ddrphy = usddrphy.USDDRPHY(platform.request("ddram"), memtype="DDR4", sys_clk_freq=sys_clk_freq)
         self.add_csr("ddrphy")
         self.add_constant("USDDRPHY", None)
-        sdram_module = EDY4016A(sys_clk_freq, "1:4")
+        check_l2_size(self.l2_size, self.ddrphy, sdram_module)
         self.register_sdram(self.ddrphy,
                             sdram_module.geom_settings,
                             sdram_module.timing_settings)
+        if with_sdram_bist:
+            add_sdram_bist(self)
+        if with_sdram_stats:
+            add_sdram_stats(self)
+        if sdram_dma_channels:
+            add_sdram_dma(self, sdram_dma_channels, sdram_dma_data_width, sdram_dma_clock_domain,
+                sdram_dma_loopback)
 
 
 # EthernetSoC ------------------------------------------------------------------------------------------
@@ -107,19 +132,14 @@ class EthernetSoC(BaseSoC):
     }
     mem_map.update(BaseSoC.mem_map)
 
-    def __init__(self, **kwargs):
+    def __init__(self, ethernet_kwargs=None, **kwargs):
         BaseSoC.__init__(self, **kwargs)
 
         self.comb += self.platform.request("sfp_tx_disable_n", 0).eq(1)
         self.submodules.ethphy = KU_1000BASEX(self.crg.cd_clk200.clk,
             self.platform.request("sfp", 0), sys_clk_freq=self.clk_freq)
         self.add_csr("ethphy")
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness)
-        self.add_wb_slave(self.mem_map["ethmac"], self.ethmac.bus, 0x2000)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethernet(self, self.ethphy, **(ethernet_kwargs or {}))
 
         self.ethphy.cd_eth_rx.clk.attr.add("keep")
         self.ethphy.cd_eth_tx.clk.attr.add("keep")
@@ -137,15 +157,22 @@ class EthernetSoC(BaseSoC):
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on KCU105")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
-    parser.add_argument("--with-ethernet", action="store_true",
-                        help="enable Ethernet support")
+    sdram_args(parser)
+    sdram_dma_args(parser)
+    parser.add_argument("--sys-clk-freq", default=125e6,
+                        help="system clock frequency, or max for the highest one validated for the "
+                             "MMCM/BUFGCE_DIV and the DDR4 (default=125MHz)")
+    ethernet_args(parser)
     args = parser.parse_args()
 
-    cls = EthernetSoC if args.with_ethernet else BaseSoC
-    soc = cls(**soc_sdram_argdict(args))
+    sys_clk_freq = "max" if args.sys_clk_freq == "max" else int(float(args.sys_clk_freq))
+    cls = EthernetSoC if ethernet_argdict(args) else BaseSoC
+    soc = cls(sys_clk_freq=sys_clk_freq, **soc_sdram_argdict(args), **sdram_argdict(args),
+        **sdram_dma_argdict(args), **ethernet_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
@@ -17,6 +17,9 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+
 from litedram.modules import AS4C16M16
 from litedram.phy import GENSDRPHY
 
@@ -47,7 +50,8 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(80e6), **kwargs):
+    def __init__(self, sys_clk_freq=int(80e6),
+        with_sdram_bist=False, with_sdram_stats=False, **kwargs):
         assert sys_clk_freq == int(80e6)
         platform = minispartan6.Platform()
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
@@ -59,21 +63,28 @@ class BaseSoC(SoCSDRAM):
         if not self.integrated_main_ram_size:
             self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"))
             sdram_module = AS4C16M16(sys_clk_freq, "1:1")
+            check_l2_size(self.l2_size, self.sdrphy, sdram_module)
             self.register_sdram(self.sdrphy,
                                 sdram_module.geom_settings,
                                 sdram_module.timing_settings)
+            if with_sdram_bist:
+                add_sdram_bist(self)
+            if with_sdram_stats:
+                add_sdram_stats(self)
 
 # Build --------------------------------------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on MiniSpartan6")
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
+    sdram_args(parser)
     args = parser.parse_args()
 
-    soc = BaseSoC(**soc_sdram_argdict(args))
+    soc = BaseSoC(**soc_sdram_argdict(args), **sdram_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 
 if __name__ == "__main__":
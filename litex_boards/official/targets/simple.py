@@ -4,8 +4,13 @@
 # This file is Copyright (c) 2013-2014 Sebastien Bourdeauducq <sb@m-labs.hk>
 # License: BSD
 
+import os
+import sys
+import time
 import argparse
 import importlib
+import traceback
+import subprocess
 
 from migen import *
 from migen.genlib.io import CRG
@@ -13,8 +18,10 @@ from migen.genlib.io import CRG
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.ethernet import *
+
 from liteeth.phy import LiteEthPHY
-from liteeth.mac import LiteEthMAC
 
 # BaseSoC ------------------------------------------------------------------------------------------
 
@@ -41,36 +48,92 @@ class EthernetSoC(BaseSoC):
         self.submodules.ethphy = LiteEthPHY(platform.request("eth_clocks"),
                                             platform.request("eth"))
         self.add_csr("ethphy")
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness, with_preamble_crc=False)
-        self.add_wb_slave(mem_decoder(self.mem_map["ethmac"]), self.ethmac.bus)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethmac(self, self.ethphy, with_preamble_crc=False)
+
+# Batch --------------------------------------------------------------------------------------------
+
+def startup_duration():
+    """Measure the cost of starting an interpreter and importing this target, as paid per subprocess"""
+    start = time.time()
+    subprocess.check_call([sys.executable, "-c", "import litex_boards.official.targets.simple"])
+    return time.time() - start
+
+
+def build_batch(platforms, with_ethernet=False, toolchain=None, output_dir="build",
+    builder_kwargs=None, cache_dir=None, **kwargs):
+    """Build the simple SoC for several platforms in the current interpreter.
+
+    Migen/LiteX and the cores are only imported once; each platform is built with its own Builder
+    in output_dir/<platform> (restored from cache_dir when already built). Returns a list of
+    (platform, error, duration) tuples, error being None on success or the traceback of the
+    failure.
+    """
+    builder_kwargs = builder_kwargs or {}
+    results = []
+    for name in platforms:
+        start = time.time()
+        error = None
+        try:
+            platform_module = importlib.import_module(name)
+            if toolchain is not None:
+                platform = platform_module.Platform(toolchain=toolchain)
+            else:
+                platform = platform_module.Platform()
+            cls = EthernetSoC if with_ethernet else BaseSoC
+            soc = cls(platform, **kwargs)
+            builder = Builder(soc, output_dir=os.path.join(output_dir, name.split(".")[-1]),
+                **builder_kwargs)
+            cached_build(builder, cache_dir, dict(kwargs, platform=name,
+                with_ethernet=with_ethernet, toolchain=toolchain, **builder_kwargs))
+        except Exception:
+            error = traceback.format_exc()
+        results.append((name, error, time.time() - start))
+    return results
 
 # Build --------------------------------------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="Generic LiteX SoC")
     builder_args(parser)
+    build_cache_args(parser)
     soc_core_args(parser)
     parser.add_argument("--with-ethernet", action="store_true",
                         help="enable Ethernet support")
-    parser.add_argument("platform",
-                        help="module name of the platform to build for")
+    parser.add_argument("platform", nargs="+",
+                        help="module name(s) of the platform(s) to build for")
     parser.add_argument("--gateware-toolchain", default=None,
                         help="FPGA gateware toolchain used for build")
     args = parser.parse_args()
 
-    platform_module = importlib.import_module(args.platform)
-    if args.gateware_toolchain is not None:
-        platform = platform_module.Platform(toolchain=args.gateware_toolchain)
+    if len(args.platform) == 1:
+        platform_module = importlib.import_module(args.platform[0])
+        if args.gateware_toolchain is not None:
+            platform = platform_module.Platform(toolchain=args.gateware_toolchain)
+        else:
+            platform = platform_module.Platform()
+        cls = EthernetSoC if args.with_ethernet else BaseSoC
+        soc = cls(platform, **soc_core_argdict(args))
+        builder = Builder(soc, **builder_argdict(args))
+        cached_build(builder, **build_cache_argdict(args))
     else:
-        platform = platform_module.Platform()
-    cls = EthernetSoC if args.with_ethernet else BaseSoC
-    soc = cls(platform, **soc_core_argdict(args))
-    builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+        builder_kwargs = builder_argdict(args)
+        output_dir = builder_kwargs.pop("output_dir", None) or "build"
+        results = build_batch(args.platform,
+            with_ethernet  = args.with_ethernet,
+            toolchain      = args.gateware_toolchain,
+            output_dir     = output_dir,
+            builder_kwargs = builder_kwargs,
+            cache_dir      = args.build_cache,
+            **soc_core_argdict(args))
+        for name, error, duration in results:
+            print("{:40s} {:4s} {:6.2f}s".format(name, "FAIL" if error else "OK", duration))
+            if error:
+                print("\n".join("    " + line for line in error.splitlines()))
+        startup = startup_duration()
+        print("Startup: {:.2f}s per subprocess, {:.2f}s saved over {} platforms".format(
+            startup, startup*(len(results) - 1), len(results)))
+        if any(error for _, error, _ in results):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
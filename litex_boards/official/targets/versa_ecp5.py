@@ -15,11 +15,14 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
-from litedram.modules import MT41K64M16
-from litedram.phy import ECP5DDRPHY
+from litex_boards.cache import *
+from litex_boards.sdram import *
+from litex_boards.ethernet import *
+
+from litedram.modules import MT41K64M16, MT48LC16M16
+from litedram.phy import ECP5DDRPHY, GENSDRPHY
 
 from liteeth.phy.ecp5rgmii import LiteEthPHYRGMII
-from liteeth.mac import LiteEthMAC
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -76,8 +79,17 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, sys_clk_freq=int(75e6), toolchain="diamond", **kwargs):
+    mem_map = {
+        "sdr_sdram": 0x20000000,  # (shadow @0xa0000000)
+    }
+    mem_map.update(SoCSDRAM.mem_map)
+
+    def __init__(self, sys_clk_freq=int(75e6), toolchain="diamond",
+        with_sdram_bist=False, with_sdram_stats=False, with_sdr_sdram=False, **kwargs):
         platform = versa_ecp5.Platform(toolchain=toolchain)
+        if sys_clk_freq == "max":
+            sys_clk_freq = ecp5_ddr3_max_sys_clk_freq(platform.device, 100e6, MT41K64M16)
+        sdram_module = ecp5_ddr3_module(platform.device, 100e6, sys_clk_freq, MT41K64M16)
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                           integrated_rom_size=0x8000,
                           **kwargs)
@@ -93,10 +105,31 @@ class BaseSoC(SoCSDRAM):
         self.add_csr("ddrphy")
         self.add_constant("ECP5DDRPHY", None)
         self.comb += crg.stop.eq(self.ddrphy.init.stop)
-        sdram_module = MT41K64M16(sys_clk_freq, "1:2")
+        check_l2_size(self.l2_size, self.ddrphy, sdram_module)
         self.register_sdram(self.ddrphy,
             sdram_module.geom_settings,
             sdram_module.timing_settings)
+        if with_sdram_bist:
+            add_sdram_bist(self)
+        if with_sdram_stats:
+            add_sdram_stats(self)
+
+        # sdr sdram (ECP5 SoC hat): independent memory region, CPU keeps running from the DDR3
+        if with_sdr_sdram:
+            if sys_clk_freq > 133e6:
+                raise ValueError("SDR SDRAM runs from sys and is limited to 133MHz")
+            platform.add_extension(versa_ecp5._ecp5_soc_hat_io)
+            # inverted sdram clock: commands/data launched on sys rising edges are sampled mid-cycle
+            self.specials += Instance("ODDRX1F",
+                i_SCLK=ClockSignal("sys"),
+                i_RST=0,
+                i_D0=0,
+                i_D1=1,
+                o_Q=platform.request("sdram_clock"))
+            # MT48LC16M16-75: CL2 up to 100MHz, CL3 up to 133MHz
+            sdr_sdram_cl = 2 if sys_clk_freq <= 100e6 else 3
+            self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"), cl=sdr_sdram_cl)
+            add_sdr_sdram(self, "sdr_sdram", self.sdrphy, MT48LC16M16(sys_clk_freq, "1:1"))
 
 # EthernetSoC --------------------------------------------------------------------------------------
 
@@ -106,19 +139,14 @@ class EthernetSoC(BaseSoC):
     }
     mem_map.update(BaseSoC.mem_map)
 
-    def __init__(self, toolchain="diamond", **kwargs):
+    def __init__(self, toolchain="diamond", ethernet_kwargs=None, **kwargs):
         BaseSoC.__init__(self, toolchain=toolchain, **kwargs)
 
         self.submodules.ethphy = LiteEthPHYRGMII(
             self.platform.request("eth_clocks"),
             self.platform.request("eth"))
         self.add_csr("ethphy")
-        self.submodules.ethmac = LiteEthMAC(phy=self.ethphy, dw=32,
-            interface="wishbone", endianness=self.cpu.endianness)
-        self.add_wb_slave(self.mem_map["ethmac"], self.ethmac.bus, 0x2000)
-        self.add_memory_region("ethmac", self.mem_map["ethmac"] | self.shadow_base, 0x2000)
-        self.add_csr("ethmac")
-        self.add_interrupt("ethmac")
+        add_ethernet(self, self.ethphy, **(ethernet_kwargs or {}))
 
         self.ethphy.crg.cd_eth_rx.clk.attr.add("keep")
         self.ethphy.crg.cd_eth_tx.clk.attr.add("keep")
@@ -132,17 +160,24 @@ def main():
     parser.add_argument("--gateware-toolchain", dest="toolchain", default="diamond",
         help='gateware toolchain to use, diamond (default) or  trellis')
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
+    sdram_args(parser)
     parser.add_argument("--sys-clk-freq", default=75e6,
-                        help="system clock frequency (default=75MHz)")
-    parser.add_argument("--with-ethernet", action="store_true",
-                        help="enable Ethernet support")
+                        help="system clock frequency, or max for the highest one validated for the "
+                             "PLL/ECLKSYNCB/CLKDIVF chain and the DDR3 (default=75MHz)")
+    ethernet_args(parser)
+    parser.add_argument("--with-sdr-sdram", action="store_true",
+                        help="enable SDR SDRAM of the ECP5 SoC hat as an additional memory region")
     args = parser.parse_args()
 
-    cls = EthernetSoC if args.with_ethernet else BaseSoC
-    soc = cls(toolchain=args.toolchain, sys_clk_freq=int(float(args.sys_clk_freq)), **soc_sdram_argdict(args))
+    sys_clk_freq = "max" if args.sys_clk_freq == "max" else int(float(args.sys_clk_freq))
+    cls = EthernetSoC if ethernet_argdict(args) else BaseSoC
+    soc = cls(toolchain=args.toolchain, sys_clk_freq=sys_clk_freq,
+        with_sdr_sdram=args.with_sdr_sdram, **soc_sdram_argdict(args), **sdram_argdict(args),
+        **ethernet_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,11 @@
-from litex_boards.partner.platforms import fomu_evt
-from litex_boards.partner.platforms import fomu_hacker
-from litex_boards.partner.platforms import fomu_pvt
-from litex_boards.partner.platforms import netv2
-from litex_boards.partner.platforms import tinyfpga_bx
-from litex_boards.partner.platforms import trellisboard
-from litex_boards.partner.platforms import ulx3s
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "fomu_evt",
+    "fomu_hacker",
+    "fomu_pvt",
+    "netv2",
+    "tinyfpga_bx",
+    "trellisboard",
+    "ulx3s",
+])
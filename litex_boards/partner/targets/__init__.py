@@ -1,3 +1,7 @@
-from litex_boards.partner.targets import netv2
-from litex_boards.partner.targets import trellisboard
-from litex_boards.partner.targets import ulx3s
+from litex_boards.registry import lazy_package
+
+__all__, __getattr__, __dir__ = lazy_package(__name__, [
+    "netv2",
+    "trellisboard",
+    "ulx3s",
+])
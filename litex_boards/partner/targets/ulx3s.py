@@ -15,13 +15,16 @@ from litex.soc.cores.clock import *
 from litex.soc.integration.soc_sdram import *
 from litex.soc.integration.builder import *
 
+from litex_boards.cache import *
+from litex_boards.sdram import *
+
 from litedram.modules import MT48LC16M16
 from litedram.phy import GENSDRPHY
 
 # CRG ----------------------------------------------------------------------------------------------
 
 class _CRG(Module):
-    def __init__(self, platform, sys_clk_freq):
+    def __init__(self, platform, sys_clk_freq, sdram_phase=None):
         self.clock_domains.cd_sys = ClockDomain()
         self.clock_domains.cd_sys_ps = ClockDomain(reset_less=True)
 
@@ -41,6 +44,7 @@ class _CRG(Module):
         pll.register_clkin(clk25, 25e6)
         pll.create_clkout(self.cd_sys, sys_clk_freq, phase=11)
         pll.create_clkout(self.cd_sys_ps, sys_clk_freq, phase=20)
+        pll.params.update(ecp5pll_phase_params(sdram_phase))
         self.specials += AsyncResetSynchronizer(self.cd_sys, rst)
 
         # sdram clock
@@ -53,21 +57,36 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCSDRAM):
-    def __init__(self, device="LFE5U-45F", toolchain="diamond", **kwargs):
+    mem_map = {
+        "sdram_phase_ram": 0x20000000,  # (shadow @0xa0000000)
+    }
+    mem_map.update(SoCSDRAM.mem_map)
+
+    def __init__(self, device="LFE5U-45F", toolchain="diamond",
+        with_sdram_bist=False, with_sdram_stats=False, with_sdram_phase=False, **kwargs):
         platform = ulx3s.Platform(device=device, toolchain=toolchain)
         sys_clk_freq = int(50e6)
         SoCSDRAM.__init__(self, platform, clk_freq=sys_clk_freq,
                           integrated_rom_size=0x8000,
                           **kwargs)
 
-        self.submodules.crg = _CRG(platform, sys_clk_freq)
+        sdram_phase = None
+        if with_sdram_phase:
+            # steps scanned by the calibration: at least one sys period at the maximum VCO frequency
+            sdram_phase = add_sdram_phase(self, 8*int(800e6//sys_clk_freq), handshake=False)
+        self.submodules.crg = _CRG(platform, sys_clk_freq, sdram_phase)
 
         if not self.integrated_main_ram_size:
             self.submodules.sdrphy = GENSDRPHY(platform.request("sdram"), cl=3)
             sdram_module = MT48LC16M16(sys_clk_freq, "1:1")
+            check_l2_size(self.l2_size, self.sdrphy, sdram_module)
             self.register_sdram(self.sdrphy,
                                 sdram_module.geom_settings,
                                 sdram_module.timing_settings)
+            if with_sdram_bist:
+                add_sdram_bist(self)
+            if with_sdram_stats:
+                add_sdram_stats(self)
 
 # Build --------------------------------------------------------------------------------------------
 
@@ -78,12 +97,16 @@ def main():
     parser.add_argument("--device", dest="device", default="LFE5U-45F",
         help='FPGA device, ULX3S can be populated with LFE5U-45F (default) or LFE5U-85F')
     builder_args(parser)
+    build_cache_args(parser)
     soc_sdram_args(parser)
+    sdram_args(parser)
+    sdram_phase_args(parser)
     args = parser.parse_args()
 
-    soc = BaseSoC(device=args.device, toolchain=args.toolchain, **soc_sdram_argdict(args))
+    soc = BaseSoC(device=args.device, toolchain=args.toolchain,
+        **soc_sdram_argdict(args), **sdram_argdict(args), **sdram_phase_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
-    builder.build()
+    cached_build(builder, **build_cache_argdict(args))
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,7 @@
-from litex_boards.official.platforms import *
-from litex_boards.partner.platforms import *
-from litex_boards.community.platforms import *
+from litex_boards.registry import lazy_merge
+
+__all__, __getattr__, __dir__ = lazy_merge(__name__, [
+    "litex_boards.official.platforms",
+    "litex_boards.partner.platforms",
+    "litex_boards.community.platforms",
+])
@@ -0,0 +1,47 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import sys
+import importlib
+
+# Lazy Registry ------------------------------------------------------------------------------------
+
+def lazy_registry(name, modules):
+    """Expose board modules as lazily imported attributes of module name.
+
+    modules maps each public board name to the full name of the module implementing it; a board
+    module is only imported on first access (through the module __getattr__ of PEP 562) and is
+    then cached in the module globals. Returns the (__all__, __getattr__, __dir__) to install.
+    On Python < 3.7, module __getattr__ is not supported and all board modules are imported.
+    """
+    def __getattr__(attr):
+        if attr not in modules:
+            raise AttributeError("module {!r} has no attribute {!r}".format(name, attr))
+        module = importlib.import_module(modules[attr])
+        setattr(sys.modules[name], attr, module)
+        return module
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[name])) | set(modules))
+
+    if sys.version_info < (3, 7):
+        namespace = vars(sys.modules[name])
+        for attr in modules:
+            namespace[attr] = importlib.import_module(modules[attr])
+
+    return sorted(modules), __getattr__, __dir__
+
+
+def lazy_package(name, boards):
+    """lazy_registry for a package whose board modules are its own submodules"""
+    return lazy_registry(name, {board: name + "." + board for board in boards})
+
+
+def lazy_merge(name, packages):
+    """lazy_registry re-exporting the boards of several lazy packages (later ones take precedence)"""
+    modules = {}
+    for package in packages:
+        package = importlib.import_module(package)
+        for board in package.__all__:
+            modules[board] = package.__name__ + "." + board
+    return lazy_registry(name, modules)
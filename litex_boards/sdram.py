@@ -0,0 +1,713 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import re
+from functools import reduce
+from operator import add
+
+from migen import *
+from migen.genlib.cdc import MultiReg, PulseSynchronizer
+
+from litex.soc.cores.clock import ECP5PLL, USMMCM
+from litex.soc.interconnect import stream, wishbone
+from litex.soc.interconnect.csr import *
+
+from litedram.phy import dfi
+from litedram.core.controller import LiteDRAMController
+from litedram.core.crossbar import LiteDRAMCrossbar
+from litedram.frontend.bist import LiteDRAMBISTGenerator, LiteDRAMBISTChecker
+from litedram.frontend.dma import LiteDRAMDMAReader, LiteDRAMDMAWriter
+from litedram.frontend.wishbone import LiteDRAMWishbone2Native
+
+__all__ = [
+    "check_l2_size",
+    "BISTBandwidth", "add_sdram_bist",
+    "SDRAMStats", "add_sdram_stats",
+    "DMAControl", "DMAReader", "DMAWriter", "add_sdram_dma",
+    "SDRInit", "SDRSDRAMCore", "add_sdr_sdram",
+    "ecp5_ddr3_module", "ecp5_ddr3_max_sys_clk_freq",
+    "usddrphy_module", "usddrphy_max_sys_clk_freq",
+    "SDRAMClockPhase", "add_sdram_phase", "altpll_phase_params", "ecp5pll_phase_params",
+    "sdram_args", "sdram_argdict", "sdram_dma_args", "sdram_dma_argdict",
+    "sdram_phase_args", "sdram_phase_argdict"
+]
+
+# L2 Cache -----------------------------------------------------------------------------------------
+
+def _sdram_size(phy, module):
+    geom   = module.geom_settings
+    nranks = getattr(phy.settings, "nranks", 1)
+    return 2**(geom.bankbits + geom.rowbits + geom.colbits)*nranks*phy.settings.databits//8
+
+
+def check_l2_size(l2_size, phy, module):
+    """Check the L2 cache size of a SoCSDRAM against the geometry of its SDRAM.
+
+    The L2 cache is connected to a native port of the controller, so its lines have the native
+    width of the SDRAM (databits x phases): the L2 must be a power of 2, hold at least one line
+    and not exceed the SDRAM capacity.
+    """
+    if not l2_size:
+        return
+    line_size  = phy.settings.dfi_databits*phy.settings.nphases//8
+    sdram_size = _sdram_size(phy, module)
+    if l2_size & (l2_size - 1):
+        raise ValueError("L2 size ({}) must be a power of 2".format(l2_size))
+    if l2_size < line_size:
+        raise ValueError("L2 size ({}) must hold at least one {}-bit line of {}".format(
+            l2_size, 8*line_size, module.__class__.__name__))
+    if l2_size > sdram_size:
+        raise ValueError("L2 size ({}) exceeds the {} bytes of {}".format(
+            l2_size, sdram_size, module.__class__.__name__))
+
+# BIST Bandwidth -----------------------------------------------------------------------------------
+
+class BISTBandwidth(Module, AutoCSR):
+    """Measures the bytes transferred by a LiteDRAM BIST module and the cycles it takes.
+
+    Counting starts when the BIST is started and stops when it reports done; bytes are counted on
+    the data endpoint (wdata for a generator, rdata for a checker) of its native port.
+    """
+    def __init__(self, bist, data, data_width):
+        self.cycles = CSRStatus(32)
+        self.bytes  = CSRStatus(32)
+
+        # # #
+
+        running = Signal()
+        done_d  = Signal()
+        self.sync += [
+            done_d.eq(bist.done.status),
+            If(bist.start.re,
+                running.eq(1),
+                self.cycles.status.eq(0),
+                self.bytes.status.eq(0)
+            ).Elif(bist.done.status & ~done_d,
+                running.eq(0)
+            ),
+            If(running,
+                self.cycles.status.eq(self.cycles.status + 1),
+                If(data.valid & data.ready,
+                    self.bytes.status.eq(self.bytes.status + data_width//8)
+                )
+            )
+        ]
+
+
+def add_sdram_bist(soc):
+    """Add LiteDRAM BIST generator/checker and their bandwidth counters to a SoCSDRAM"""
+    write_port = soc.sdram.crossbar.get_port(mode="write")
+    read_port  = soc.sdram.crossbar.get_port(mode="read")
+    soc.submodules.sdram_generator = LiteDRAMBISTGenerator(write_port)
+    soc.submodules.sdram_checker   = LiteDRAMBISTChecker(read_port)
+    soc.submodules.sdram_generator_bandwidth = BISTBandwidth(soc.sdram_generator,
+        write_port.wdata, write_port.data_width)
+    soc.submodules.sdram_checker_bandwidth   = BISTBandwidth(soc.sdram_checker,
+        read_port.rdata, read_port.data_width)
+    for name in ["sdram_generator", "sdram_checker",
+                 "sdram_generator_bandwidth", "sdram_checker_bandwidth"]:
+        soc.add_csr(name)
+
+# Statistics ---------------------------------------------------------------------------------------
+
+class SDRAMStats(Module, AutoCSR):
+    """DRAM command counters on the DFI interface between the controller and the PHY.
+
+    update latches the counters in their CSRs and reset clears them. Row misses are the activates;
+    row hits are the column commands issued to an already open row (reads + writes - activates).
+    idle counts the cycles without command on any DFI phase.
+    """
+    commands = {
+        # name         ras_n, cas_n, we_n
+        "activates":  (0,     1,     1),
+        "precharges": (0,     1,     0),
+        "reads":      (1,     0,     1),
+        "writes":     (1,     0,     0),
+        "refreshes":  (0,     0,     1),
+    }
+
+    def __init__(self, dfi):
+        self.reset  = CSR()
+        self.update = CSR()
+        names = ["cycles", "idle"] + sorted(self.commands.keys())
+        for name in names:
+            setattr(self, name, CSRStatus(32, name=name))
+
+        # # #
+
+        counters = {name: Signal(32) for name in names}
+        selected = [Signal() for phase in dfi.phases]
+        for cs, phase in zip(selected, dfi.phases):
+            self.comb += cs.eq((phase.cs_n != (2**len(phase.cs_n) - 1)) &
+                ~(phase.ras_n & phase.cas_n & phase.we_n))
+        increments = {
+            "cycles": 1,
+            "idle":   Cat(*selected) == 0,
+        }
+        for name, (ras_n, cas_n, we_n) in self.commands.items():
+            increments[name] = reduce(add, [cs &
+                (phase.ras_n == ras_n) & (phase.cas_n == cas_n) & (phase.we_n == we_n)
+                for cs, phase in zip(selected, dfi.phases)])
+        self.sync += [
+            If(self.reset.re,
+                [counters[name].eq(0) for name in names]
+            ).Else(
+                [counters[name].eq(counters[name] + increments[name]) for name in names]
+            ),
+            If(self.update.re,
+                [getattr(self, name).status.eq(counters[name]) for name in names]
+            )
+        ]
+
+
+def add_sdram_stats(soc):
+    """Add DRAM command counters (on the controller side of the DFI injector) to a SoCSDRAM"""
+    soc.submodules.sdram_stats = SDRAMStats(soc.sdram.dfii.slave)
+    soc.add_csr("sdram_stats")
+
+# DMA ----------------------------------------------------------------------------------------------
+
+class DMAControl(Module, AutoCSR):
+    """CSR control of a LiteDRAM DMA: generates length addresses from base.
+
+    base and length are in words of the native port; addresses are generated in clock_domain
+    (the clock domain of the port). done is set once the last address has been accepted.
+    """
+    def __init__(self, address_width, clock_domain="sys"):
+        self.base   = CSRStorage(address_width)
+        self.length = CSRStorage(address_width)
+        self.start  = CSR()
+        self.done   = CSRStatus()
+
+        self.valid   = Signal()
+        self.ready   = Signal()
+        self.address = Signal(address_width)
+
+        # # #
+
+        base   = Signal(address_width)
+        length = Signal(address_width)
+        start  = Signal()
+        done   = Signal(reset=1)
+        if clock_domain == "sys":
+            self.comb += [
+                base.eq(self.base.storage),
+                length.eq(self.length.storage),
+                start.eq(self.start.re),
+                self.done.status.eq(done)
+            ]
+        else:
+            self.submodules.start_ps = PulseSynchronizer("sys", clock_domain)
+            self.specials += [
+                MultiReg(self.base.storage, base, clock_domain),
+                MultiReg(self.length.storage, length, clock_domain),
+                MultiReg(done, self.done.status)
+            ]
+            self.comb += [
+                self.start_ps.i.eq(self.start.re),
+                start.eq(self.start_ps.o)
+            ]
+
+        offset = Signal(address_width)
+        self.comb += [
+            self.valid.eq(~done),
+            self.address.eq(base + offset)
+        ]
+        sync = getattr(self.sync, clock_domain)
+        sync += [
+            If(start,
+                offset.eq(0),
+                done.eq(length == 0)
+            ).Elif(self.valid & self.ready,
+                offset.eq(offset + 1),
+                If(offset == (length - 1),
+                    done.eq(1)
+                )
+            )
+        ]
+
+
+class DMAReader(DMAControl):
+    """CSR controlled LiteDRAMDMAReader, read data is provided on source"""
+    def __init__(self, port, fifo_depth=16):
+        DMAControl.__init__(self, port.address_width, port.clock_domain)
+
+        # # #
+
+        dma = LiteDRAMDMAReader(port, fifo_depth)
+        if port.clock_domain != "sys":
+            dma = ClockDomainsRenamer(port.clock_domain)(dma)
+        self.submodules.dma = dma
+        self.source = dma.source
+        self.comb += [
+            dma.sink.valid.eq(self.valid),
+            dma.sink.address.eq(self.address),
+            self.ready.eq(dma.sink.ready)
+        ]
+
+
+class DMAWriter(DMAControl):
+    """CSR controlled LiteDRAMDMAWriter, data to write is taken from sink"""
+    def __init__(self, port, fifo_depth=16):
+        DMAControl.__init__(self, port.address_width, port.clock_domain)
+        self.sink = sink = stream.Endpoint([("data", port.data_width)])
+
+        # # #
+
+        dma = LiteDRAMDMAWriter(port, fifo_depth)
+        if port.clock_domain != "sys":
+            dma = ClockDomainsRenamer(port.clock_domain)(dma)
+        self.submodules.dma = dma
+        self.comb += [
+            dma.sink.valid.eq(self.valid & sink.valid),
+            dma.sink.address.eq(self.address),
+            dma.sink.data.eq(sink.data),
+            sink.ready.eq(self.valid & dma.sink.ready),
+            self.ready.eq(sink.valid & dma.sink.ready)
+        ]
+
+
+def _clock_domain_names(module):
+    names = {cd.name for cd in module._fragment.clock_domains}
+    for _, submodule in module._submodules:
+        names |= _clock_domain_names(submodule)
+    return names
+
+
+def add_sdram_dma(soc, channels, data_width=None, clock_domain="sys", loopback=False):
+    """Add DMA channels (a DMAReader and a DMAWriter on their own crossbar ports) to a SoCSDRAM.
+
+    The ports have data_width bits (default: native controller width) and run in clock_domain,
+    which must already be created by the SoC (CRG). User logic connects to the source of
+    sdram_dma_reader<n> and the sink of sdram_dma_writer<n>; with loopback, each reader is
+    connected to the writer of its channel (copy engine).
+    """
+    clock_domains = _clock_domain_names(soc)
+    if clock_domain not in clock_domains:
+        raise ValueError("SDRAM DMA clock domain {} is not a clock domain of the SoC ({})".format(
+            clock_domain, ", ".join(sorted(clock_domains))))
+    for i in range(channels):
+        reader = DMAReader(soc.sdram.crossbar.get_port(mode="read",
+            data_width=data_width, clock_domain=clock_domain))
+        writer = DMAWriter(soc.sdram.crossbar.get_port(mode="write",
+            data_width=data_width, clock_domain=clock_domain))
+        setattr(soc.submodules, "sdram_dma_reader{}".format(i), reader)
+        setattr(soc.submodules, "sdram_dma_writer{}".format(i), writer)
+        soc.add_csr("sdram_dma_reader{}".format(i))
+        soc.add_csr("sdram_dma_writer{}".format(i))
+        if loopback:
+            soc.comb += reader.source.connect(writer.sink)
+
+# SDR SDRAM Region ---------------------------------------------------------------------------------
+
+class SDRInit(Module):
+    """Hardware initialization sequence of a SDR SDRAM.
+
+    The main SDRAM of a SoCSDRAM is initialized by the BIOS through the DFI injector; an additional
+    SDRAM is initialized by this sequence instead: the PHY is driven by the sequence until done,
+    then by the controller connected to slave.
+    """
+    def __init__(self, phy, module, clk_freq):
+        settings   = phy.settings
+        geom       = module.geom_settings
+        self.slave = dfi.Interface(geom.addressbits, geom.bankbits, settings.nranks,
+            settings.dfi_databits, settings.nphases)
+        self.done  = Signal()
+
+        # # #
+
+        init = dfi.Interface(geom.addressbits, geom.bankbits, settings.nranks,
+            settings.dfi_databits, settings.nphases)
+        self.comb += If(self.done,
+            self.slave.connect(phy.dfi)
+        ).Else(
+            init.connect(phy.dfi)
+        )
+
+        # (cs_n, ras_n, cas_n, we_n)
+        nop           = (1, 1, 1, 1)
+        precharge_all = (0, 0, 1, 0)
+        auto_refresh  = (0, 0, 0, 1)
+        mode_register = (0, 0, 0, 0)
+        mr = log2_int(settings.nphases) + (settings.cl << 4) # Burst length / CAS latency.
+        sequence = [
+            # command, address, delay (cycles)
+            (nop,           0x0000, int(200e-6*clk_freq)), # Power-up with CKE high.
+            (precharge_all, 0x0400, 32),
+            (auto_refresh,  0x0000, 32),
+            (auto_refresh,  0x0000, 32),
+            (mode_register, mr,     32),
+        ]
+
+        step    = Signal(max=len(sequence) + 1)
+        counter = Signal(max=max(delay for _, _, delay in sequence) + 1)
+        self.comb += self.done.eq(step == len(sequence))
+        self.comb += [phase.cke.eq(2**settings.nranks - 1) for phase in init.phases]
+        commands = {}
+        delays   = {}
+        p0       = init.phases[0]
+        for i, ((cs_n, ras_n, cas_n, we_n), address, delay) in enumerate(sequence):
+            commands[i] = [
+                p0.cs_n.eq(Replicate(cs_n, settings.nranks)),
+                p0.ras_n.eq(ras_n),
+                p0.cas_n.eq(cas_n),
+                p0.we_n.eq(we_n),
+                p0.address.eq(address)
+            ]
+            delays[i] = If(counter == delay,
+                counter.eq(0),
+                step.eq(step + 1)
+            ).Else(
+                counter.eq(counter + 1)
+            )
+        self.comb += If(~self.done & (counter == 0), Case(step, commands))
+        self.sync += If(~self.done, Case(step, delays))
+
+
+class SDRSDRAMCore(Module):
+    """LiteDRAM controller and crossbar of an additional SDR SDRAM, initialized by SDRInit"""
+    def __init__(self, phy, module, clk_freq):
+        self.size = _sdram_size(phy, module)
+
+        # # #
+
+        self.submodules.init = SDRInit(phy, module, clk_freq)
+        self.submodules.controller = LiteDRAMController(phy.settings,
+            module.geom_settings, module.timing_settings, clk_freq)
+        self.comb += self.controller.dfi.connect(self.init.slave)
+        self.submodules.crossbar = LiteDRAMCrossbar(self.controller.interface)
+
+
+def add_sdr_sdram(soc, name, phy, module):
+    """Add a SDR SDRAM to a SoC as an independent memory region at soc.mem_map[name].
+
+    The region is accessed by the CPU through its own crossbar port (uncached, through the shadow
+    base); other ports of the crossbar (soc.<name>.crossbar) are available for streaming logic.
+    """
+    core = SDRSDRAMCore(phy, module, soc.clk_freq)
+    setattr(soc.submodules, name, core)
+    bus    = wishbone.Interface()
+    bridge = LiteDRAMWishbone2Native(bus, core.crossbar.get_port(data_width=32))
+    setattr(soc.submodules, name + "_wishbone_bridge", bridge)
+    soc.add_wb_slave(soc.mem_map[name], bus, core.size)
+    soc.add_memory_region(name, soc.mem_map[name] | soc.shadow_base, core.size)
+
+# DDR Clocking -------------------------------------------------------------------------------------
+
+def _module_speedgrade(module_cls, data_rate):
+    """Speed grade of module_cls for data_rate (transfers/s).
+
+    None (the default speed grade of the module) if it supports data_rate, otherwise the slowest
+    faster speed grade supporting it.
+    """
+    timings = module_cls.speedgrade_timings
+    default = [int(sg) for sg in timings if sg.isdigit() and timings[sg] is timings.get("default")]
+    if not default or default[0] >= data_rate/1e6:
+        return None
+    speedgrades = sorted(int(sg) for sg in timings if sg.isdigit() and int(sg) >= data_rate/1e6)
+    if not speedgrades:
+        raise ValueError("{:3.2f}MT/s exceeds the speed grades of {}".format(
+            data_rate/1e6, module_cls.__name__))
+    return str(speedgrades[0])
+
+
+def _max_sys_clk_freq(check, max_freq, min_freq, step):
+    sys_clk_freq = step*(max_freq//step)
+    while sys_clk_freq >= min_freq:
+        try:
+            check(int(sys_clk_freq))
+            return int(sys_clk_freq)
+        except ValueError:
+            sys_clk_freq -= step
+    raise ValueError("No valid sys_clk_freq above {:3.2f}MHz".format(min_freq/1e6))
+
+# ECP5 DDR3 ----------------------------------------------------------------------------------------
+
+# Maximum edge clock (ECLKSYNCB/ODDRX2 gearing) frequency of the ECP5 DDR memory interfaces per speed
+# grade. ECP5DDRPHY runs its IOs from sys2x on the edge clock and sys is divided by 2 from it by
+# CLKDIVF (DIV=2.0 is the only division compatible with X2 gearing): the PHY ratio is fixed to 1:2.
+ecp5_eclk_max_freq = {
+    6: 311e6,
+    7: 364e6,
+    8: 400e6,
+}
+
+
+def _ecp5_speedgrade(device):
+    m = re.match(r"LFE5\w+-\d+F-(\d)", device)
+    if m is None:
+        raise ValueError("Unknown ECP5 device: {}".format(device))
+    return int(m.group(1))
+
+
+def ecp5_ddr3_module(device, clkin_freq, sys_clk_freq, module_cls):
+    """Validate sys_clk_freq for ECP5DDRPHY on device and return the matching DDR3 module.
+
+    sys2x (2 x sys_clk_freq) must be generated by the PLL from clkin_freq (along with the 25MHz init
+    clock of the CRG) and meet the edge clock limit of the speed grade; the module is created with
+    its default speed grade, or the slowest faster one if the resulting data rate (4 x sys_clk_freq)
+    requires it.
+    """
+    sys2x_freq = 2*sys_clk_freq
+    eclk_max   = ecp5_eclk_max_freq[_ecp5_speedgrade(device)]
+    if sys2x_freq > eclk_max:
+        raise ValueError("sys2x ({:3.2f}MHz) exceeds the {:3.2f}MHz ECLKSYNCB/CLKDIVF limit of {}".format(
+            sys2x_freq/1e6, eclk_max/1e6, device))
+    pll = ECP5PLL()
+    pll.register_clkin(Signal(), clkin_freq)
+    pll.create_clkout(ClockDomain("sys2x_i"), sys2x_freq)
+    pll.create_clkout(ClockDomain("init"), 25e6)
+    try:
+        pll.compute_config()
+    except ValueError:
+        raise ValueError("No PLL config found for sys2x={:3.2f}MHz from clkin={:3.2f}MHz".format(
+            sys2x_freq/1e6, clkin_freq/1e6))
+    return module_cls(sys_clk_freq, "1:2", speedgrade=_module_speedgrade(module_cls, 2*sys2x_freq))
+
+
+def ecp5_ddr3_max_sys_clk_freq(device, clkin_freq, module_cls, min_freq=75e6, step=1e6):
+    """Highest sys_clk_freq (multiple of step) accepted by ecp5_ddr3_module"""
+    return _max_sys_clk_freq(
+        check    = lambda f: ecp5_ddr3_module(device, clkin_freq, f, module_cls),
+        max_freq = ecp5_eclk_max_freq[_ecp5_speedgrade(device)]/2,
+        min_freq = min_freq,
+        step     = step)
+
+# UltraScale DDR -----------------------------------------------------------------------------------
+
+# Maximum sys4x frequency of USDDRPHY per speed grade. The PHY serializes its IOs 8:1 in component
+# mode from sys4x (DDR) and sys is divided by 4 from it by a BUFGCE_DIV: the PHY ratio is 1:4.
+usddrphy_sys4x_max_freq = {
+    1: 500e6,
+    2: 625e6,
+    3: 625e6,
+}
+
+
+def _xilinx_speedgrade(device):
+    m = re.match(r"\w+-\w+-(\d)", device)
+    if m is None:
+        raise ValueError("Unknown Xilinx device: {}".format(device))
+    return int(m.group(1))
+
+
+def usddrphy_module(device, clkin_freq, sys_clk_freq, module_cls):
+    """Validate sys_clk_freq for USDDRPHY on device and return the matching DDR3/DDR4 module.
+
+    sys4x (4 x sys_clk_freq) must be generated by the MMCM from clkin_freq (along with the 200MHz
+    IDELAYCTRL reference clock) and meet the limit of the speed grade; the module is created with
+    its default speed grade, or the slowest faster one if the resulting data rate (8 x sys_clk_freq)
+    requires it.
+    """
+    speedgrade = _xilinx_speedgrade(device)
+    sys4x_freq = 4*sys_clk_freq
+    sys4x_max  = usddrphy_sys4x_max_freq[speedgrade]
+    if sys4x_freq > sys4x_max:
+        raise ValueError("sys4x ({:3.2f}MHz) exceeds the {:3.2f}MHz USDDRPHY limit of {}".format(
+            sys4x_freq/1e6, sys4x_max/1e6, device))
+    mmcm = USMMCM(speedgrade=-speedgrade)
+    mmcm.register_clkin(Signal(), clkin_freq)
+    mmcm.create_clkout(ClockDomain("pll4x"), sys4x_freq, buf=None, with_reset=False)
+    mmcm.create_clkout(ClockDomain("clk200"), 200e6, with_reset=False)
+    try:
+        mmcm.compute_config()
+    except ValueError:
+        raise ValueError("No MMCM config found for sys4x={:3.2f}MHz from clkin={:3.2f}MHz".format(
+            sys4x_freq/1e6, clkin_freq/1e6))
+    return module_cls(sys_clk_freq, "1:4", speedgrade=_module_speedgrade(module_cls, 2*sys4x_freq))
+
+
+def usddrphy_max_sys_clk_freq(device, clkin_freq, module_cls, min_freq=125e6, step=1e6):
+    """Highest sys_clk_freq (multiple of step) accepted by usddrphy_module"""
+    return _max_sys_clk_freq(
+        check    = lambda f: usddrphy_module(device, clkin_freq, f, module_cls),
+        max_freq = usddrphy_sys4x_max_freq[_xilinx_speedgrade(device)]/4,
+        min_freq = min_freq,
+        step     = step)
+
+# SDRAM Clock Phase --------------------------------------------------------------------------------
+
+class SDRAMClockPhase(Module, AutoCSR):
+    """Runtime adjustment of the phase of the PLL output clocking a SDR SDRAM.
+
+    Writing up (down) advances (delays) the phase by one PLL step; position is the number of steps
+    issued to the PLL from the static phase (requests written while busy are ignored) and busy is
+    set while a step is in progress. Steps are generated in clock_domain (the dynamic phase shift
+    clock of the PLL): phasestep is asserted until phasedone goes low and the step completes when
+    phasedone is back high (handshake), or phasestep is asserted for step_cycles cycles and the
+    step completes after step_cycles more cycles.
+    """
+    def __init__(self, clock_domain="sys", handshake=True, step_cycles=4):
+        self.up       = CSR()
+        self.down     = CSR()
+        self.busy     = CSRStatus()
+        self.position = CSRStatus(16)
+
+        self.phasestep   = Signal()
+        self.phaseupdown = Signal()
+        self.phasedone   = Signal(reset=1)
+
+        # # #
+
+        up       = Signal()
+        down     = Signal()
+        busy     = Signal()
+        position = Signal(16)
+        if clock_domain == "sys":
+            self.comb += [
+                up.eq(self.up.re),
+                down.eq(self.down.re),
+                self.busy.status.eq(busy),
+                self.position.status.eq(position)
+            ]
+        else:
+            self.submodules.up_ps   = PulseSynchronizer("sys", clock_domain)
+            self.submodules.down_ps = PulseSynchronizer("sys", clock_domain)
+            # position only changes while busy: it is stable when read with busy low.
+            self.specials += [
+                MultiReg(busy, self.busy.status),
+                MultiReg(position, self.position.status)
+            ]
+            self.comb += [
+                self.up_ps.i.eq(self.up.re),
+                self.down_ps.i.eq(self.down.re),
+                up.eq(self.up_ps.o),
+                down.eq(self.down_ps.o)
+            ]
+
+        stepping = Signal()
+        counter  = Signal(max=step_cycles)
+        if handshake:
+            step_done = ~self.phasedone
+            wait_done = self.phasedone
+        else:
+            step_done = (counter == (step_cycles - 1))
+            wait_done = (counter == (step_cycles - 1))
+        self.comb += self.phasestep.eq(stepping)
+        sync = getattr(self.sync, clock_domain)
+        sync += [
+            If(~busy,
+                If(up | down,
+                    busy.eq(1),
+                    stepping.eq(1),
+                    self.phaseupdown.eq(up),
+                    counter.eq(0),
+                    position.eq(Mux(up, position + 1, position - 1))
+                )
+            ).Elif(stepping,
+                counter.eq(counter + 1),
+                If(step_done,
+                    stepping.eq(0),
+                    counter.eq(0)
+                )
+            ).Else(
+                counter.eq(counter + 1),
+                If(wait_done,
+                    busy.eq(0)
+                )
+            )
+        ]
+
+
+def add_sdram_phase(soc, steps, ram_size=0x2000, **kwargs):
+    """Add a SDRAMClockPhase (created with kwargs) and the integrated RAM of its calibration.
+
+    steps is the number of PLL steps scanned by the calibration (SDRAM_PHASE_STEPS). The calibration
+    firmware can't run from main_ram and the integrated SRAM is used by the BIOS (data, bss and
+    stack), so it runs from its own RAM at soc.mem_map["sdram_phase_ram"].
+    """
+    soc.submodules.sdram_phase = phase = SDRAMClockPhase(**kwargs)
+    soc.add_csr("sdram_phase")
+    soc.add_constant("SDRAM_PHASE_STEPS", steps)
+    soc.submodules.sdram_phase_ram = wishbone.SRAM(ram_size)
+    soc.add_wb_slave(soc.mem_map["sdram_phase_ram"], soc.sdram_phase_ram.bus, ram_size)
+    soc.add_memory_region("sdram_phase_ram", soc.mem_map["sdram_phase_ram"], ram_size)
+    return phase
+
+
+def altpll_phase_params(phase, clkout=0, clock_domain="sys"):
+    """ALTPLL parameters connecting the dynamic phase shift of clkout to a SDRAMClockPhase.
+
+    clock_domain is the clock domain of the SDRAMClockPhase, used as scan clock of the PLL.
+    """
+    if phase is None:
+        return {}
+    return dict(
+        p_PORT_PHASECOUNTERSELECT="PORT_USED",
+        p_PORT_PHASEUPDOWN="PORT_USED",
+        p_PORT_PHASESTEP="PORT_USED",
+        p_PORT_PHASEDONE="PORT_USED",
+        p_PORT_SCANCLK="PORT_USED",
+        i_PHASECOUNTERSELECT=2 + clkout, # C0..C4 counters
+        i_PHASEUPDOWN=phase.phaseupdown,
+        i_PHASESTEP=phase.phasestep,
+        i_SCANCLK=ClockSignal(clock_domain),
+        o_PHASEDONE=phase.phasedone)
+
+
+# PHASESEL code of the EHXPLLL outputs of the ECP5PLL clkouts (clkout0: CLKOP, clkout1: CLKOS,
+# clkout2: CLKOS2, clkout3: CLKOS3).
+_ecp5pll_phasesel = {0: 0b11, 1: 0b00, 2: 0b01, 3: 0b10}
+
+
+def ecp5pll_phase_params(phase, clkout=1):
+    """EHXPLLL parameters connecting the dynamic phase shift of clkout to a SDRAMClockPhase.
+
+    The ECP5 PLL has no phase shift completion output: phase must be created with handshake=False.
+    """
+    if phase is None:
+        return {}
+    phasesel = _ecp5pll_phasesel[clkout]
+    return dict(
+        p_DPHASE_SOURCE="ENABLED",
+        i_PHASESEL0=phasesel & 0b01,
+        i_PHASESEL1=(phasesel & 0b10) >> 1,
+        i_PHASEDIR=phase.phaseupdown,
+        i_PHASESTEP=phase.phasestep,
+        i_PHASELOADREG=0)
+
+# Arguments ----------------------------------------------------------------------------------------
+
+def sdram_args(parser):
+    parser.add_argument("--with-sdram-bist", action="store_true",
+                        help="enable SDRAM BIST with bandwidth counters")
+    parser.add_argument("--with-sdram-stats", action="store_true",
+                        help="enable DRAM command counters (commands, refreshes, row hits/misses, idle)")
+
+
+def sdram_argdict(args):
+    return {
+        "with_sdram_bist":  args.with_sdram_bist,
+        "with_sdram_stats": args.with_sdram_stats,
+    }
+
+
+def sdram_dma_args(parser):
+    parser.add_argument("--sdram-dma-channels", default=0, type=int,
+                        help="number of SDRAM DMA channels (reader + writer) on user ports (default=0)")
+    parser.add_argument("--sdram-dma-data-width", default=None, type=int,
+                        help="data width of the SDRAM DMA ports (default=native width)")
+    parser.add_argument("--sdram-dma-clock-domain", default="sys",
+                        help="clock domain (of the CRG) of the SDRAM DMA ports (default=sys)")
+    parser.add_argument("--sdram-dma-loopback", action="store_true",
+                        help="connect each SDRAM DMA reader to its writer (copy engine)")
+
+
+def sdram_dma_argdict(args):
+    return {
+        "sdram_dma_channels":     args.sdram_dma_channels,
+        "sdram_dma_data_width":   args.sdram_dma_data_width,
+        "sdram_dma_clock_domain": args.sdram_dma_clock_domain,
+        "sdram_dma_loopback":     args.sdram_dma_loopback,
+    }
+
+
+def sdram_phase_args(parser):
+    parser.add_argument("--with-sdram-phase", action="store_true",
+                        help="enable runtime adjustment of the SDRAM clock phase (for calibration)")
+
+
+def sdram_phase_argdict(args):
+    return {
+        "with_sdram_phase": args.with_sdram_phase,
+    }
@@ -1,3 +1,7 @@
-from litex_boards.official.targets import *
-from litex_boards.partner.targets import *
-from litex_boards.community.targets import *
+from litex_boards.registry import lazy_merge
+
+__all__, __getattr__, __dir__ = lazy_merge(__name__, [
+    "litex_boards.official.targets",
+    "litex_boards.partner.targets",
+    "litex_boards.community.targets",
+])
@@ -0,0 +1,47 @@
+# Build of the firmwares of software/, included by their Makefile after setting:
+#   FIRMWARE:     name of the firmware (FIRMWARE.elf/FIRMWARE.bin).
+#   OBJECTS:      objects built from the firmware directory (the common isr.o is added).
+#   REGION:       memory region the firmware is linked into (default=main_ram).
+#   STACK_REGION: memory region holding the stack, at its top (default=sram).
+
+COMMON_DIRECTORY:=$(dir $(lastword $(MAKEFILE_LIST)))
+
+REGION?=main_ram
+STACK_REGION?=sram
+
+include $(BUILD_DIR)/software/include/generated/variables.mak
+include $(SOC_DIRECTORY)/software/common.mak
+
+OBJECTS+=isr.o
+
+all: $(FIRMWARE).bin
+
+%.bin: %.elf
+	$(OBJCOPY) -O binary $< $@
+	chmod -x $@
+
+region.ld: Makefile
+	echo 'REGION_ALIAS("firmware", $(REGION));' > $@
+	echo 'REGION_ALIAS("stack", $(STACK_REGION));' >> $@
+
+$(FIRMWARE).elf: $(OBJECTS) region.ld
+	$(LD) $(LDFLAGS) \
+		-T $(COMMON_DIRECTORY)linker.ld \
+		-N -o $@ \
+		$(BUILDINC_DIRECTORY)/../libbase/crt0-$(CPU)-ctr.o \
+		$(OBJECTS) \
+		-L$(BUILDINC_DIRECTORY)/../libbase \
+		-L$(BUILDINC_DIRECTORY)/../libcompiler_rt \
+		-lbase-nofloat -lcompiler_rt
+	chmod -x $@
+
+isr.o: $(COMMON_DIRECTORY)isr.c
+	$(compile)
+
+%.o: %.c
+	$(compile)
+
+clean:
+	$(RM) $(OBJECTS) region.ld $(FIRMWARE).elf $(FIRMWARE).bin .*~ *~
+
+.PHONY: all clean
@@ -0,0 +1,97 @@
+// This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+// License: BSD
+
+// Ethernet echo through the slot rings of --with-ethernet-dma: the rings are placed in the upper
+// half of main_ram, each received frame is sent back with its MAC addresses swapped. Press a key
+// to print the frame, drop and ring level counters (to size the rings from real traffic).
+
+#include <stdio.h>
+#include <string.h>
+
+#include <irq.h>
+#include <uart.h>
+#include <system.h>
+
+#include <generated/csr.h>
+#include <generated/mem.h>
+
+#define RX_BASE (MAIN_RAM_SIZE/2)
+#define TX_BASE (RX_BASE + ETHDMA_NRXSLOTS*ETHDMA_SLOT_SIZE)
+
+#define HEADER_LENGTH 0x0000ffff
+#define HEADER_ERROR  0x80000000
+
+static unsigned char *slot(unsigned int base, int n)
+{
+	return (unsigned char *)(MAIN_RAM_BASE + base + n*ETHDMA_SLOT_SIZE);
+}
+
+// DMA accesses bypass the CPU caches: invalidate before reading the RX ring, write back after
+// filling the TX ring.
+static void flush_caches(void)
+{
+	flush_cpu_dcache();
+#ifdef L2_SIZE
+	flush_l2_cache();
+#endif
+}
+
+int main(void)
+{
+	unsigned int header, length;
+	unsigned int echoed;
+	unsigned char *rx, *tx;
+	int rx_consume, tx_produce;
+
+#ifdef CONFIG_CPU_HAS_INTERRUPT
+	irq_setmask(0);
+	irq_setie(1);
+#endif
+	uart_init();
+
+	printf("Ethernet DMA echo: %d RX / %d TX slots of %d bytes\n",
+		ETHDMA_NRXSLOTS, ETHDMA_NTXSLOTS, ETHDMA_SLOT_SIZE);
+
+	rx_consume = 0;
+	tx_produce = 0;
+	echoed = 0;
+	ethdma_rx_base_write(RX_BASE);
+	ethdma_rx_consume_write(rx_consume);
+	ethdma_tx_base_write(TX_BASE);
+	ethdma_tx_produce_write(tx_produce);
+	ethdma_enable_write(1);
+
+	while(1) {
+		if(readchar_nonblock()) {
+			readchar();
+			ethstats_update_write(1);
+			printf("rx: %u (errors: %u, drops: %u, max level: %u/%d), tx: %u, echoed: %u\n",
+				ethstats_rx_frames_read(), ethstats_rx_errors_read(), ethdma_rx_drops_read(),
+				ethdma_rx_max_level_read(), ETHDMA_NRXSLOTS - 1, ethstats_tx_frames_read(),
+				echoed);
+		}
+		if(ethdma_rx_produce_read() == rx_consume)
+			continue;
+
+		flush_caches();
+		rx = slot(RX_BASE, rx_consume);
+		header = *(volatile unsigned int *)rx;
+		length = header & HEADER_LENGTH;
+		if(!(header & HEADER_ERROR) && (length >= 12)) {
+			while(((tx_produce + 1) % ETHDMA_NTXSLOTS) == ethdma_tx_consume_read());
+			tx = slot(TX_BASE, tx_produce);
+			memcpy(tx + ETHDMA_HEADER_SIZE, rx + ETHDMA_HEADER_SIZE + 6, 6);
+			memcpy(tx + ETHDMA_HEADER_SIZE + 6, rx + ETHDMA_HEADER_SIZE, 6);
+			memcpy(tx + ETHDMA_HEADER_SIZE + 12, rx + ETHDMA_HEADER_SIZE + 12, length - 12);
+			*(volatile unsigned int *)tx = length;
+			flush_caches();
+			tx_produce = (tx_produce + 1) % ETHDMA_NTXSLOTS;
+			ethdma_tx_produce_write(tx_produce);
+			echoed++;
+		}
+		rx_consume = (rx_consume + 1) % ETHDMA_NRXSLOTS;
+		ethdma_rx_consume_write(rx_consume);
+	}
+
+	return 0;
+}
@@ -0,0 +1,86 @@
+// This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+// License: BSD
+
+// Measures the memset/memcpy throughput of main_ram for buffer sizes below and above the L2
+// cache size, to compare L2 settings and SDRAM configurations on hardware.
+
+#include <stdio.h>
+#include <string.h>
+
+#include <irq.h>
+#include <uart.h>
+#include <system.h>
+
+#include <generated/csr.h>
+#include <generated/mem.h>
+
+#define MIN_SIZE   1024
+#define MAX_SIZE   (4*1024*1024)
+#define TOTAL_SIZE (16*1024*1024)
+
+static void timer_start(void)
+{
+	timer0_en_write(0);
+	timer0_reload_write(0);
+	timer0_load_write(0xffffffff);
+	timer0_en_write(1);
+}
+
+static unsigned int timer_elapsed(void)
+{
+	timer0_update_value_write(1);
+	return 0xffffffff - timer0_value_read();
+}
+
+static void print_throughput(const char *name, unsigned int size, unsigned int bytes, unsigned int ticks)
+{
+	unsigned long long kbps;
+
+	kbps = ((unsigned long long)bytes*CONFIG_CLOCK_FREQUENCY/1024)/ticks;
+	printf("%-8s %8u bytes: %6u.%03u MB/s\n", name, size,
+		(unsigned int)(kbps/1024), (unsigned int)((kbps%1024)*1000/1024));
+}
+
+int main(void)
+{
+	unsigned char *src, *dst;
+	unsigned int size, i, n;
+
+#ifdef CONFIG_CPU_HAS_INTERRUPT
+	irq_setmask(0);
+	irq_setie(1);
+#endif
+	uart_init();
+
+	src = (unsigned char *)(MAIN_RAM_BASE + MAIN_RAM_SIZE/2);
+	dst = src + MAX_SIZE;
+
+#ifdef L2_SIZE
+	printf("L2 size: %d bytes\n", L2_SIZE);
+#endif
+	for(size = MIN_SIZE; size <= MAX_SIZE; size *= 2) {
+		n = TOTAL_SIZE/size;
+
+		flush_cpu_dcache();
+#ifdef L2_SIZE
+		flush_l2_cache();
+#endif
+		timer_start();
+		for(i = 0; i < n; i++)
+			memset(dst, i, size);
+		print_throughput("memset", size, n*size, timer_elapsed());
+
+		flush_cpu_dcache();
+#ifdef L2_SIZE
+		flush_l2_cache();
+#endif
+		timer_start();
+		for(i = 0; i < n; i++)
+			memcpy(dst, src, size);
+		print_throughput("memcpy", size, n*size, timer_elapsed());
+	}
+
+	while(1);
+
+	return 0;
+}
@@ -0,0 +1,116 @@
+// This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+// License: BSD
+
+// Scans the phase of the SDRAM clock over SDRAM_PHASE_STEPS PLL steps, tests main_ram at each
+// step and centers the phase in the largest passing window, then returns to the BIOS (which boots
+// with the calibrated phase, kept by the PLL until reconfiguration).
+
+#include <stdio.h>
+
+#include <irq.h>
+#include <uart.h>
+#include <system.h>
+
+#include <generated/csr.h>
+#include <generated/mem.h>
+
+#define TEST_WORDS 1024
+
+static unsigned char pass[SDRAM_PHASE_STEPS];
+
+static void phase_step(int up)
+{
+	if(up)
+		sdram_phase_up_write(1);
+	else
+		sdram_phase_down_write(1);
+	while(sdram_phase_busy_read());
+}
+
+static unsigned int lfsr(unsigned int x)
+{
+	return (x >> 1) ^ (-(x & 1) & 0xd0000001);
+}
+
+static int memtest(void)
+{
+	volatile unsigned int *array = (unsigned int *)MAIN_RAM_BASE;
+	unsigned int seed;
+	int i, errors;
+
+	seed = 1;
+	for(i = 0; i < TEST_WORDS; i++) {
+		seed = lfsr(seed);
+		array[i] = seed;
+	}
+
+	flush_cpu_dcache();
+#ifdef L2_SIZE
+	flush_l2_cache();
+#endif
+
+	errors = 0;
+	seed = 1;
+	for(i = 0; i < TEST_WORDS; i++) {
+		seed = lfsr(seed);
+		if(array[i] != seed)
+			errors++;
+	}
+	return errors;
+}
+
+int main(void)
+{
+	int i, start, length, best_start, best_length, target;
+
+#ifdef CONFIG_CPU_HAS_INTERRUPT
+	irq_setmask(0);
+	irq_setie(1);
+#endif
+	uart_init();
+
+	printf("Scanning %d SDRAM clock phase steps:\n", SDRAM_PHASE_STEPS);
+	for(i = 0; i < SDRAM_PHASE_STEPS; i++) {
+		pass[i] = (memtest() == 0);
+		putchar(pass[i] ? '1' : '0');
+		phase_step(1);
+	}
+	printf("\n");
+
+	/* The scan covers a full clock period: the results are circular and a window passing at
+	 * the end of the scan continues at its start, so scan them twice (windows up to a period). */
+	start = 0;
+	length = 0;
+	best_start = 0;
+	best_length = 0;
+	for(i = 0; i < 2*SDRAM_PHASE_STEPS; i++) {
+		if(pass[i % SDRAM_PHASE_STEPS] && (length < SDRAM_PHASE_STEPS)) {
+			if(length == 0)
+				start = i % SDRAM_PHASE_STEPS;
+			length++;
+			if(length > best_length) {
+				best_start = start;
+				best_length = length;
+			}
+		} else
+			length = 0;
+	}
+
+	if(best_length == 0) {
+		printf("No working phase found, restoring static phase\n");
+		target = 0;
+	} else {
+		target = (best_start + best_length/2) % SDRAM_PHASE_STEPS;
+		printf("Passing window: steps %d-%d\n", best_start,
+			(best_start + best_length - 1) % SDRAM_PHASE_STEPS);
+	}
+	for(i = SDRAM_PHASE_STEPS; i > target; i--)
+		phase_step(0);
+	printf("SDRAM clock phase: %d steps\n", (short)sdram_phase_position_read());
+
+	flush_cpu_icache();
+	flush_cpu_dcache();
+	((void (*)(void))ROM_BASE)();
+
+	return 0;
+}
@@ -0,0 +1,144 @@
+// This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+// License: BSD
+
+// Console exposing the DRAM command counters of --with-sdram-stats: sdram_stats prints the
+// commands, refreshes, row hits/misses and idle cycles since the last sdram_stats_reset, memload
+// generates memcpy traffic on main_ram to observe them.
+
+#include <stdio.h>
+#include <string.h>
+
+#include <irq.h>
+#include <uart.h>
+#include <system.h>
+
+#include <generated/csr.h>
+#include <generated/mem.h>
+
+#define MEMLOAD_SIZE (1024*1024)
+
+static void print_ratio(const char *name, unsigned int value, unsigned int total)
+{
+	unsigned long long permille;
+
+	permille = total ? ((unsigned long long)value*1000)/total : 0;
+	printf("%-12s %10u (%3u.%u%%)\n", name, value,
+		(unsigned int)(permille/10), (unsigned int)(permille%10));
+}
+
+static void sdram_stats(void)
+{
+	unsigned int cycles, idle, activates, precharges, reads, writes, refreshes;
+	unsigned int accesses, hits;
+
+	sdram_stats_update_write(1);
+	cycles     = sdram_stats_cycles_read();
+	idle       = sdram_stats_idle_read();
+	activates  = sdram_stats_activates_read();
+	precharges = sdram_stats_precharges_read();
+	reads      = sdram_stats_reads_read();
+	writes     = sdram_stats_writes_read();
+	refreshes  = sdram_stats_refreshes_read();
+
+	accesses = reads + writes;
+	hits     = (accesses > activates) ? accesses - activates : 0;
+
+	printf("cycles       %10u\n", cycles);
+	print_ratio("idle", idle, cycles);
+	printf("activates    %10u\n", activates);
+	printf("precharges   %10u\n", precharges);
+	printf("reads        %10u\n", reads);
+	printf("writes       %10u\n", writes);
+	printf("refreshes    %10u\n", refreshes);
+	print_ratio("row hits", hits, accesses);
+	print_ratio("row misses", accesses - hits, accesses);
+}
+
+static void sdram_stats_reset(void)
+{
+	sdram_stats_reset_write(1);
+}
+
+static void memload(void)
+{
+	unsigned char *src, *dst;
+
+	src = (unsigned char *)(MAIN_RAM_BASE + MAIN_RAM_SIZE/2);
+	dst = src + MEMLOAD_SIZE;
+	memcpy(dst, src, MEMLOAD_SIZE);
+	flush_cpu_dcache();
+#ifdef L2_SIZE
+	flush_l2_cache();
+#endif
+}
+
+static char *readstr(void)
+{
+	static char s[64];
+	static int ptr = 0;
+	char c;
+
+	if(!readchar_nonblock())
+		return NULL;
+	c = readchar();
+	switch(c) {
+		case 0x7f:
+		case 0x08:
+			if(ptr > 0) {
+				ptr--;
+				putsnonl("\x08 \x08");
+			}
+			break;
+		case '\r':
+		case '\n':
+			s[ptr] = 0x00;
+			putsnonl("\n");
+			ptr = 0;
+			return s;
+		default:
+			if(ptr >= (int)sizeof(s) - 1)
+				break;
+			putchar(c);
+			s[ptr++] = c;
+			break;
+	}
+	return NULL;
+}
+
+static void help(void)
+{
+	puts("sdram_stats       - print DRAM command counters");
+	puts("sdram_stats_reset - reset DRAM command counters");
+	puts("memload           - generate memcpy traffic on main_ram");
+}
+
+int main(void)
+{
+	char *command;
+
+#ifdef CONFIG_CPU_HAS_INTERRUPT
+	irq_setmask(0);
+	irq_setie(1);
+#endif
+	uart_init();
+
+	help();
+	sdram_stats_reset();
+	putsnonl("STATS> ");
+	while(1) {
+		command = readstr();
+		if(command == NULL)
+			continue;
+		if(strcmp(command, "sdram_stats") == 0)
+			sdram_stats();
+		else if(strcmp(command, "sdram_stats_reset") == 0)
+			sdram_stats_reset();
+		else if(strcmp(command, "memload") == 0)
+			memload();
+		else if(command[0] != 0x00)
+			help();
+		putsnonl("STATS> ");
+	}
+
+	return 0;
+}
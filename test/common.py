@@ -0,0 +1,43 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+from migen import *
+
+
+class NativePortModel:
+    """Memory behind LiteDRAM native ports, commands accepted on 2 cycles out of 3"""
+    def __init__(self, mem=None):
+        self.mem    = {} if mem is None else mem
+        self.reads  = 0
+        self.writes = 0
+
+    @passive
+    def write(self, port):
+        queue = []
+        cycle = 0
+        while True:
+            yield port.cmd.ready.eq(cycle % 3 != 0)
+            yield port.wdata.ready.eq(len(queue) > 0)
+            yield
+            cycle += 1
+            if (yield port.cmd.valid) and (yield port.cmd.ready):
+                queue.append((yield port.cmd.addr))
+            if (yield port.wdata.valid) and (yield port.wdata.ready):
+                self.mem[queue.pop(0)] = (yield port.wdata.data)
+                self.writes += 1
+
+    @passive
+    def read(self, port):
+        queue = []
+        cycle = 0
+        while True:
+            yield port.cmd.ready.eq(cycle % 3 != 0)
+            yield port.rdata.valid.eq(len(queue) > 0)
+            yield port.rdata.data.eq(self.mem.get(queue[0], 0) if queue else 0)
+            yield
+            cycle += 1
+            if (yield port.rdata.valid) and (yield port.rdata.ready):
+                queue.pop(0)
+                self.reads += 1
+            if (yield port.cmd.valid) and (yield port.cmd.ready):
+                queue.append((yield port.cmd.addr))
@@ -0,0 +1,106 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import unittest
+import tempfile
+import shutil
+import os
+
+from litex_boards.cache import build_cache_key, cached_build
+
+
+class DummyPlatform:
+    device = "xc7a35ticsg324-1L"
+
+
+class DummySoC:
+    cpu_type    = "vexriscv"
+    cpu_variant = None
+    mem_map     = {"rom": 0x00000000, "sram": 0x10000000}
+    clk_freq    = int(100e6)
+
+    def __init__(self):
+        self.platform = DummyPlatform()
+
+
+class DummyBuilder:
+    def __init__(self, soc, output_dir, csr_csv=None):
+        self.soc        = soc
+        self.output_dir = output_dir
+        self.csr_csv    = csr_csv
+        self.builds     = 0
+
+    def build(self):
+        self.builds += 1
+        os.makedirs(os.path.join(self.output_dir, "gateware"), exist_ok=True)
+        with open(os.path.join(self.output_dir, "gateware", "top.v"), "w") as f:
+            f.write("module top();\nendmodule\n")
+        generated = os.path.join(self.output_dir, "software", "include", "generated")
+        os.makedirs(generated, exist_ok=True)
+        with open(os.path.join(generated, "variables.mak"), "w") as f:
+            f.write("BUILDINC_DIRECTORY={}\n".format(
+                os.path.join(os.path.abspath(self.output_dir), "software", "include")))
+        if self.csr_csv is not None:
+            with open(self.csr_csv, "w") as f:
+                f.write("csr_base,uart,0xe0001000,,\n")
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_key(self):
+        soc = DummySoC()
+        key = build_cache_key(soc, {"with_ethernet": False})
+        self.assertEqual(key, build_cache_key(DummySoC(), {"with_ethernet": False}))
+        self.assertEqual(key, build_cache_key(soc, {"with_ethernet": False, "output_dir": "x"}))
+        self.assertNotEqual(key, build_cache_key(soc, {"with_ethernet": True}))
+        soc.clk_freq = int(125e6)
+        self.assertNotEqual(key, build_cache_key(soc, {"with_ethernet": False}))
+
+    def test_cached_build(self):
+        cache_dir = os.path.join(self.dir, "cache")
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build0"))
+        cached_build(builder, cache_dir)
+        self.assertEqual(builder.builds, 1)
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build1"))
+        cached_build(builder, cache_dir)
+        self.assertEqual(builder.builds, 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "build1", "gateware", "top.v")))
+        generated = os.path.join(self.dir, "build1", "software", "include", "generated")
+        with open(os.path.join(generated, "variables.mak")) as f:
+            self.assertEqual(f.read(), "BUILDINC_DIRECTORY={}\n".format(
+                os.path.join(self.dir, "build1", "software", "include")))
+
+    def test_csr_csv(self):
+        # CSR csv written outside of the output directory is restored too.
+        cache_dir = os.path.join(self.dir, "cache")
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build0"),
+            os.path.join(self.dir, "csr0.csv"))
+        cached_build(builder, cache_dir)
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build1"),
+            os.path.join(self.dir, "csr", "csr1.csv"))
+        cached_build(builder, cache_dir)
+        self.assertEqual(builder.builds, 0)
+        with open(os.path.join(self.dir, "csr", "csr1.csv")) as f:
+            self.assertEqual(f.read(), "csr_base,uart,0xe0001000,,\n")
+
+    def test_csr_csv_not_stored(self):
+        # An entry stored without the requested CSR csv is not used.
+        cache_dir = os.path.join(self.dir, "cache")
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build0"))
+        cached_build(builder, cache_dir)
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build1"),
+            os.path.join(self.dir, "csr.csv"))
+        cached_build(builder, cache_dir)
+        self.assertEqual(builder.builds, 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.dir, "csr.csv")))
+
+    def test_no_cache(self):
+        builder = DummyBuilder(DummySoC(), os.path.join(self.dir, "build"))
+        cached_build(builder)
+        cached_build(builder)
+        self.assertEqual(builder.builds, 2)
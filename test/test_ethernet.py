@@ -0,0 +1,290 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import unittest
+
+from migen import *
+
+from litex.soc.interconnect import stream
+
+from litedram.common import LiteDRAMNativePort
+
+from liteeth.common import eth_phy_description, eth_udp_user_description, convert_ip
+
+from litex_boards.ethernet import EthernetDMA, UDPStreamer
+
+from test.common import NativePortModel
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def frame(n, seed=0):
+    return bytes((seed + 7*i) & 0xff for i in range(n))
+
+# Ethernet DMA -------------------------------------------------------------------------------------
+
+class MACCoreStub:
+    def __init__(self):
+        self.source = stream.Endpoint(eth_phy_description(32))
+        self.sink   = stream.Endpoint(eth_phy_description(32))
+
+
+class EthernetDMADUT(Module):
+    nslots     = 4
+    slot_size  = 256
+    port_bytes = 8
+    rx_base    = 0x1000
+    tx_base    = 0x2000
+
+    def __init__(self):
+        self.core    = MACCoreStub()
+        self.rx_port = LiteDRAMNativePort("write", 24, 8*self.port_bytes)
+        self.tx_port = LiteDRAMNativePort("read",  24, 8*self.port_bytes)
+        self.submodules.dma = EthernetDMA(self.core, self.rx_port, self.tx_port,
+            nrxslots       = self.nslots,
+            ntxslots       = self.nslots,
+            slot_size      = self.slot_size,
+            rx_buffer_size = 2*self.slot_size,
+            endianness     = "little")
+        self.memory = NativePortModel()
+
+    def slot_word(self, base, slot):
+        return base//self.port_bytes + slot*self.slot_size//self.port_bytes
+
+    def read_slot(self, base, slot):
+        """(length, error, data) of a RX slot"""
+        word   = self.slot_word(base, slot)
+        header = self.memory.mem.get(word, 0)
+        length = header & 0xffff
+        data   = b""
+        for i in range((length + self.port_bytes - 1)//self.port_bytes):
+            data += self.memory.mem.get(word + 1 + i, 0).to_bytes(self.port_bytes, "little")
+        return length, (header >> 31) & 0b1, data[:length]
+
+    def write_slot(self, base, slot, data):
+        word = self.slot_word(base, slot)
+        self.memory.mem[word] = len(data)
+        for i in range(0, len(data), self.port_bytes):
+            self.memory.mem[word + 1 + i//self.port_bytes] = int.from_bytes(
+                data[i:i + self.port_bytes].ljust(self.port_bytes, b"\0"), "little")
+
+    def send(self, data, gap=32):
+        """Send a frame on the MAC source (never stalled by the DMA)"""
+        source = self.core.source
+        words  = [data[i:i + 4] for i in range(0, len(data), 4)]
+        for i, word in enumerate(words):
+            last = (i == len(words) - 1)
+            yield source.valid.eq(1)
+            yield source.data.eq(int.from_bytes(word.ljust(4, b"\0"), "little"))
+            yield source.last.eq(last)
+            yield source.last_be.eq(1 << (len(word) - 1) if last else 0)
+            yield
+        yield source.valid.eq(0)
+        for i in range(gap):
+            yield
+
+    @passive
+    def receive(self, frames):
+        """Collect the frames sent on the MAC sink"""
+        sink = self.core.sink
+        data = b""
+        while True:
+            yield sink.ready.eq(1)
+            yield
+            if (yield sink.valid):
+                word = (yield sink.data).to_bytes(4, "little")
+                if (yield sink.last):
+                    last_be = (yield sink.last_be)
+                    data += word[:log2_int(last_be) + 1]
+                    frames.append(data)
+                    data = b""
+                else:
+                    data += word
+
+    def wait(self, cond, timeout=10000):
+        for i in range(timeout):
+            if (yield from cond()):
+                return
+            yield
+        raise TimeoutError
+
+
+class TestEthernetDMA(unittest.TestCase):
+    def run_dut(self, dut, generator, tx_frames=None):
+        generators = [
+            generator,
+            dut.memory.write(dut.rx_port),
+            dut.memory.read(dut.tx_port),
+            dut.receive(tx_frames if tx_frames is not None else [])
+        ]
+        run_simulation(dut, generators)
+
+    def enable(self, dut):
+        yield dut.dma.rx_base.storage.eq(dut.rx_base)
+        yield dut.dma.tx_base.storage.eq(dut.tx_base)
+        yield dut.dma.enable.storage.eq(1)
+        yield
+
+    def test_rx_ring(self):
+        # Frames go to consecutive slots, rx_produce wrapping around the ring.
+        dut = EthernetDMADUT()
+        frames = [frame(n, seed) for seed, n in enumerate([60, 1, 2, 3, 4, 5, 64, 103])]
+        results = []
+        def generator():
+            yield from self.enable(dut)
+            for i, data in enumerate(frames):
+                yield from dut.send(data)
+                slot = i % dut.nslots
+                produce = lambda: (yield dut.dma.rx_produce.status) == (slot + 1) % dut.nslots
+                yield from dut.wait(produce)
+                results.append(dut.read_slot(dut.rx_base, slot))
+                yield dut.dma.rx_consume.storage.eq((slot + 1) % dut.nslots)
+                yield
+            results.append((yield dut.dma.rx_drops.status))
+        self.run_dut(dut, generator())
+        self.assertEqual(results[:-1], [(len(data), 0, data) for data in frames])
+        self.assertEqual(results[-1], 0)
+
+    def test_rx_full(self):
+        # Without software consuming, the ring holds nslots - 1 frames, the others are dropped.
+        dut = EthernetDMADUT()
+        frames = [frame(40, seed) for seed in range(dut.nslots + 2)]
+        results = {}
+        def generator():
+            yield from self.enable(dut)
+            for data in frames:
+                yield from dut.send(data, gap=256)
+            results["produce"]   = (yield dut.dma.rx_produce.status)
+            results["drops"]     = (yield dut.dma.rx_drops.status)
+            results["max_level"] = (yield dut.dma.rx_max_level.status)
+            results["slots"]     = [dut.read_slot(dut.rx_base, n)[2] for n in range(dut.nslots)]
+            # Consuming a slot makes room for the next frame.
+            yield dut.dma.rx_consume.storage.eq(1)
+            yield from dut.send(frame(40, 100), gap=256)
+            results["produce_after"] = (yield dut.dma.rx_produce.status)
+            results["wrapped"]       = dut.read_slot(dut.rx_base, dut.nslots - 1)[2]
+        self.run_dut(dut, generator())
+        self.assertEqual(results["produce"], dut.nslots - 1)
+        self.assertEqual(results["drops"], 3)
+        self.assertEqual(results["max_level"], dut.nslots - 1)
+        self.assertEqual(results["slots"][:dut.nslots - 1], frames[:dut.nslots - 1])
+        self.assertEqual(results["produce_after"], 0)
+        self.assertEqual(results["wrapped"], frame(40, 100))
+
+    def test_rx_oversized(self):
+        # Frames exceeding the slot are truncated and flagged in error.
+        dut = EthernetDMADUT()
+        results = []
+        def generator():
+            yield from self.enable(dut)
+            yield from dut.send(frame(dut.slot_size + 16), gap=256)
+            results.append((yield dut.dma.rx_produce.status))
+            results.append(dut.read_slot(dut.rx_base, 0)[1])
+        self.run_dut(dut, generator())
+        self.assertEqual(results, [1, 1])
+
+    def test_tx_ring(self):
+        # Frames are sent from consecutive slots, tx_consume wrapping around the ring.
+        dut = EthernetDMADUT()
+        frames = [frame(n, seed) for seed, n in enumerate([60, 1, 2, 3, 4, 5, 64, 103])]
+        sent = []
+        def generator():
+            yield from self.enable(dut)
+            produce = 0
+            for data in frames:
+                not_full = lambda: ((produce + 1) % dut.nslots) != (yield dut.dma.tx_consume.status)
+                yield from dut.wait(not_full)
+                dut.write_slot(dut.tx_base, produce, data)
+                produce = (produce + 1) % dut.nslots
+                yield dut.dma.tx_produce.storage.eq(produce)
+                yield
+            yield from dut.wait(lambda: (yield dut.dma.tx_consume.status) == produce)
+            for i in range(16):
+                yield
+        self.run_dut(dut, generator(), sent)
+        self.assertEqual(sent, frames)
+
+# UDP Streamer -------------------------------------------------------------------------------------
+
+class UDPPortStub:
+    def __init__(self):
+        self.sink   = stream.Endpoint(eth_udp_user_description(8))
+        self.source = stream.Endpoint(eth_udp_user_description(8))
+
+
+class TestUDPStreamer(unittest.TestCase):
+    packet_size = 16
+
+    def setUp(self):
+        self.port = UDPPortStub()
+        self.dut  = UDPStreamer(self.port, clk_freq=1000, src_port=1234,
+            ip_address  = "192.168.1.100",
+            udp_port    = 2000,
+            packet_size = self.packet_size,
+            fifo_depth  = 64)
+        self.packets = []
+        self.words   = 0
+
+    @passive
+    def receive(self):
+        sink = self.port.sink
+        data = []
+        cycle = 0
+        while True:
+            yield sink.ready.eq(cycle % 4 != 0)
+            yield
+            cycle += 1
+            if (yield sink.valid) and (yield sink.ready):
+                self.words += 1
+                data.append((yield sink.data))
+                if (yield sink.last):
+                    fields = {}
+                    for name in ["src_port", "dst_port", "ip_address", "length"]:
+                        fields[name] = (yield getattr(sink, name))
+                    self.packets.append((fields, data))
+                    data = []
+
+    def push(self, words):
+        for word in words:
+            yield self.dut.sink.valid.eq(1)
+            yield self.dut.sink.data.eq(word)
+            yield
+        yield self.dut.sink.valid.eq(0)
+        for i in range(128):
+            yield
+
+    def test_packets(self):
+        results = {}
+        def generator():
+            yield self.dut.enable.storage.eq(1)
+            # 1.5 packets: only the complete packet is sent, the rest waits in the FIFO.
+            yield from self.push(range(24))
+            results["first"] = (len(self.packets), self.words)
+            # The destination applies to the next packets.
+            yield self.dut.ip_address.storage.eq(convert_ip("192.168.1.101"))
+            yield self.dut.udp_port.storage.eq(3000)
+            yield from self.push(range(24, 32))
+            results["packets"] = (yield self.dut.packets.status)
+            results["drops"]   = (yield self.dut.drops.status)
+        run_simulation(self.dut, [generator(), self.receive()])
+        self.assertEqual(results["first"], (1, self.packet_size))
+        self.assertEqual(len(self.packets), 2)
+        for i, (fields, data) in enumerate(self.packets):
+            self.assertEqual(data, list(range(16*i, 16*(i + 1))))
+            self.assertEqual(fields["src_port"], 1234)
+            self.assertEqual(fields["length"], self.packet_size)
+        self.assertEqual(self.packets[0][0]["ip_address"], convert_ip("192.168.1.100"))
+        self.assertEqual(self.packets[0][0]["dst_port"], 2000)
+        self.assertEqual(self.packets[1][0]["ip_address"], convert_ip("192.168.1.101"))
+        self.assertEqual(self.packets[1][0]["dst_port"], 3000)
+        self.assertEqual(results["packets"], 2)
+        self.assertEqual(results["drops"], 0)
+
+    def test_disabled(self):
+        # Words received while disabled are dropped, nothing is sent.
+        results = {}
+        def generator():
+            yield from self.push(range(32))
+            results["drops"] = (yield self.dut.drops.status)
+        run_simulation(self.dut, [generator(), self.receive()])
+        self.assertEqual(self.packets, [])
+        self.assertEqual(results["drops"], 32)
@@ -0,0 +1,130 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import unittest
+import tempfile
+import shutil
+import stat
+import time
+import sys
+import os
+
+from litex_boards.farm import Build, Scheduler, parse_slots, unique_names
+
+# Stub toolchain: records its start/end in a log shared by all the builds of the toolchain and
+# in a log shared by all the builds.
+stub = """#!/bin/sh
+echo "+" >> {log}
+echo "+" >> {all_log}
+sleep 0.3
+echo "-" >> {log}
+echo "-" >> {all_log}
+exit {returncode}
+"""
+
+
+def write_executable(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+def max_concurrency(log):
+    n = m = 0
+    with open(log) as f:
+        for event in f.read().split():
+            n += 1 if event == "+" else -1
+            m = max(m, n)
+    return m
+
+
+class TestFarm(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def stub_build(self, target, returncode=0):
+        build = Build(target, output_dir=self.dir)
+        path = os.path.join(self.dir, build.toolchain + str(returncode))
+        write_executable(path, stub.format(log=os.path.join(self.dir, build.toolchain + ".log"),
+            all_log=os.path.join(self.dir, "all.log"), returncode=returncode))
+        build.cmd = [path]
+        return build
+
+    def test_toolchains(self):
+        self.assertEqual(Build("kc705").toolchain, "vivado")
+        self.assertEqual(Build("de0nano").toolchain, "quartus")
+        self.assertEqual(Build("versa_ecp5").toolchain, "diamond")
+        self.assertEqual(Build("versa_ecp5",
+            options=["--gateware-toolchain=trellis"]).toolchain, "trellis")
+        self.assertEqual(Build("simple",
+            options=["litex_boards.partner.platforms.fomu_pvt"]).toolchain, "icestorm")
+
+    def test_names(self):
+        build = Build("simple", options=["litex_boards.partner.platforms.fomu_pvt", "--x=../y"])
+        self.assertEqual(build.name,
+            "simple_basesoc_litex_boards_partner_platforms_fomu_pvt_x____y")
+        self.assertEqual(os.path.dirname(build.output_dir), "build")
+        builds = [Build("arty"), Build("kc705"), Build("arty")]
+        unique_names(builds)
+        self.assertEqual([build.name for build in builds],
+            ["arty_basesoc_0", "kc705_basesoc", "arty_basesoc_1"])
+        self.assertEqual(len({build.output_dir for build in builds}), 3)
+
+    def test_slots(self):
+        self.assertEqual(parse_slots("vivado=2,quartus=1"), {"vivado": 2, "quartus": 1})
+        builds  = [self.stub_build(target) for target in ["arty", "kc705", "kcu105", "genesys2"]]
+        builds += [self.stub_build(target) for target in ["versa_ecp5"]*3]
+        builds += [self.stub_build("ulx3s")]
+        scheduler = Scheduler(jobs=4, slots={"vivado": 2, "diamond": 3}, poll_period=0.01)
+        scheduler.run(builds)
+        self.assertTrue(all(build.returncode == 0 for build in builds))
+        self.assertEqual(len({build.output_dir for build in builds}), len(builds))
+        self.assertEqual(max_concurrency(os.path.join(self.dir, "vivado.log")), 2)
+        self.assertLessEqual(max_concurrency(os.path.join(self.dir, "diamond.log")), 3)
+
+    def test_failure(self):
+        builds = [self.stub_build("de0nano", returncode=1), self.stub_build("de10lite")]
+        Scheduler(jobs=2, poll_period=0.01).run(builds)
+        self.assertEqual([build.returncode for build in builds], [1, 0])
+        self.assertEqual(max_concurrency(os.path.join(self.dir, "quartus.log")), 1)
+
+    def test_interrupt(self):
+        class InterruptedBuild(Build):
+            def get_cmd(self):
+                raise KeyboardInterrupt
+        build = self.stub_build("fomu_pvt")
+        build.cmd = ["sleep", "30"]
+        start = time.time()
+        with self.assertRaises(KeyboardInterrupt):
+            interrupted = InterruptedBuild("fomu_evt", output_dir=self.dir)
+            Scheduler(jobs=2, poll_period=0.01).run([build, interrupted])
+        self.assertLess(time.time() - start, 10)
+        self.assertIsNotNone(build.process.poll())
+        self.assertNotEqual(build.returncode, 0)
+
+    def test_get_cmd(self):
+        build = Build("arty", options=["--sys-clk-freq=100e6"], output_dir=self.dir)
+        self.assertEqual(build.get_cmd(), [sys.executable, "-m",
+            "litex_boards.official.targets.arty", "--output-dir", build.output_dir,
+            "--sys-clk-freq=100e6"])
+        build = Build("de10lite", soc="EthernetSoC", output_dir=self.dir)
+        self.assertEqual(build.get_cmd()[2:], ["litex_boards.community.targets.de10lite",
+            "--output-dir", build.output_dir, "--with-ethernet"])
+        with self.assertRaises(ValueError):
+            Build("arty", soc="MiniSoC").get_cmd()
+        with self.assertRaises(ValueError):
+            Build("not_a_board").get_cmd()
+        self.assertEqual(Build("arty", cmd=["true"]).get_cmd(), ["true"])
+
+    def test_default_slots(self):
+        # One build per toolchain at a time by default, the toolchains running concurrently.
+        targets = ["arty", "kc705", "de0nano", "de10lite", "versa_ecp5", "ulx3s"]
+        builds  = [self.stub_build(target) for target in targets]
+        Scheduler(jobs=len(builds), poll_period=0.01).run(builds)
+        self.assertTrue(all(build.returncode == 0 for build in builds))
+        for toolchain in ["vivado", "quartus", "diamond"]:
+            self.assertEqual(max_concurrency(os.path.join(self.dir, toolchain + ".log")), 1)
+        self.assertGreater(max_concurrency(os.path.join(self.dir, "all.log")), 1)
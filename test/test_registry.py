@@ -0,0 +1,45 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import subprocess
+import unittest
+import sys
+
+
+def imported_boards(statement, package):
+    """Board modules of package loaded by a fresh interpreter after running statement"""
+    script = statement + """
+import sys
+print(" ".join(m for m in sys.modules if m.startswith("{}.")))
+""".format(package)
+    return subprocess.check_output([sys.executable, "-c", script]).decode().split()
+
+
+class TestRegistry(unittest.TestCase):
+    def test_platforms_lazy(self):
+        modules = imported_boards("import litex_boards.platforms",
+            "litex_boards.official.platforms")
+        self.assertEqual(modules, [])
+
+    def test_platforms_single_board(self):
+        modules = imported_boards("from litex_boards.platforms import arty",
+            "litex_boards.official.platforms")
+        self.assertEqual(modules, ["litex_boards.official.platforms.arty"])
+
+    def test_platforms_names(self):
+        import litex_boards.platforms
+        self.assertIn("kc705", litex_boards.platforms.__all__)
+        self.assertIn("fomu_pvt", dir(litex_boards.platforms))
+        with self.assertRaises(AttributeError):
+            litex_boards.platforms.not_a_board
+
+    def test_targets_lazy(self):
+        modules = imported_boards("import litex_boards.targets", "litex_boards.official.targets")
+        self.assertEqual(modules, [])
+        modules = imported_boards("import litex_boards.targets", "litedram")
+        self.assertEqual(modules, [])
+
+    def test_targets_names(self):
+        import litex_boards.targets
+        self.assertIn("simple", litex_boards.targets.__all__)
+        self.assertIn("ulx3s", litex_boards.targets.__all__)
@@ -0,0 +1,379 @@
+# This file is Copyright (c) 2019 Florent Kermarrec <florent@enjoy-digital.fr>
+# License: BSD
+
+import unittest
+
+from migen import *
+
+from litedram.common import LiteDRAMNativePort
+from litedram.phy import dfi
+from litedram.modules import MT41K64M16, MT41J256M16, EDY4016A
+
+from litex_boards.sdram import ecp5pll_phase_params, SDRAMClockPhase, SDRAMStats, add_sdram_dma
+from litex_boards.sdram import ecp5_ddr3_module, usddrphy_module, _module_speedgrade
+
+from test.common import NativePortModel
+
+
+class DummyPhase:
+    phasestep   = "phasestep"
+    phaseupdown = "phaseupdown"
+
+
+class TestSDRAM(unittest.TestCase):
+    def test_ecp5pll_phasesel(self):
+        # EHXPLLL PHASESEL: 00: CLKOS, 01: CLKOS2, 10: CLKOS3, 11: CLKOP.
+        for clkout, phasesel in [(0, 0b11), (1, 0b00), (2, 0b01), (3, 0b10)]:
+            params = ecp5pll_phase_params(DummyPhase(), clkout=clkout)
+            self.assertEqual(params["i_PHASESEL1"], (phasesel >> 1) & 0b1)
+            self.assertEqual(params["i_PHASESEL0"], phasesel & 0b1)
+
+    def test_ecp5pll_no_phase(self):
+        self.assertEqual(ecp5pll_phase_params(None), {})
+
+# DDR Clocking -------------------------------------------------------------------------------------
+
+class DummyModule:
+    speedgrade_timings = {"800": "800", "1333": "1333", "1600": "1600"}
+    speedgrade_timings["default"] = speedgrade_timings["1333"]
+
+
+class TestDDRClocking(unittest.TestCase):
+    def test_module_speedgrade(self):
+        # The default speed grade is kept while it supports the data rate.
+        for data_rate in [300e6, 800e6, 1333e6]:
+            self.assertIsNone(_module_speedgrade(DummyModule, data_rate))
+        self.assertEqual(_module_speedgrade(DummyModule, 1400e6), "1600")
+        self.assertEqual(_module_speedgrade(DummyModule, 1600e6), "1600")
+        with self.assertRaises(ValueError):
+            _module_speedgrade(DummyModule, 1700e6)
+
+    def test_ecp5_ddr3_module(self):
+        # versa_ecp5 and trellisboard at their default 75MHz: default speed grade.
+        for device, clkin_freq, module_cls in [
+            ("LFE5UM5G-45F-8BG381C", 100e6, MT41K64M16),
+            ("LFE5UM5G-85F-8BG756C", 12e6,  MT41J256M16)]:
+            module = ecp5_ddr3_module(device, clkin_freq, 75e6, module_cls)
+            self.assertIsNone(module.speedgrade)
+
+    def test_usddrphy_module(self):
+        # kcu105 at its default 125MHz: default (2400) EDY4016A speed grade.
+        module = usddrphy_module("xcku040-ffva1156-2-e", 125e6, 125e6, EDY4016A)
+        self.assertIsNone(module.speedgrade)
+        with self.assertRaises(ValueError):
+            usddrphy_module("xcku040-ffva1156-2-e", 125e6, 175e6, EDY4016A)
+
+# Statistics ---------------------------------------------------------------------------------------
+
+# DFI commands: cs_n, ras_n, cas_n, we_n (cs_n high: deselected, whatever the command).
+NOP  = (0, 1, 1, 1)
+DES  = (1, 0, 1, 1)
+ACT  = (0, 0, 1, 1)
+PRE  = (0, 0, 1, 0)
+READ = (0, 1, 0, 1)
+WRIT = (0, 1, 0, 0)
+REF  = (0, 0, 0, 1)
+
+
+class TestSDRAMStats(unittest.TestCase):
+    def test_counters(self):
+        interface = dfi.Interface(13, 3, 1, 32, nphases=2)
+        dut       = SDRAMStats(interface)
+        sequence  = [
+            [ACT,  NOP],
+            [READ, READ],
+            [NOP,  NOP],
+            [WRIT, PRE],
+            [REF,  DES],
+            [DES,  NOP],
+        ]
+        results = []
+
+        def drive(commands):
+            for phase, (cs_n, ras_n, cas_n, we_n) in zip(interface.phases, commands):
+                yield phase.cs_n.eq(cs_n)
+                yield phase.ras_n.eq(ras_n)
+                yield phase.cas_n.eq(cas_n)
+                yield phase.we_n.eq(we_n)
+
+        def pulse(csr):
+            yield csr.re.eq(1)
+            yield
+            yield csr.re.eq(0)
+
+        def read():
+            names = ["cycles", "idle"] + sorted(SDRAMStats.commands.keys())
+            counters = {}
+            for name in names:
+                counters[name] = (yield getattr(dut, name).status)
+            results.append(counters)
+
+        def generator():
+            yield from drive([NOP, NOP])
+            yield from pulse(dut.reset)
+            for commands in sequence:
+                yield from drive(commands)
+                yield
+            yield from drive([NOP, NOP])
+            yield from pulse(dut.update)
+            # The CSRs hold their values until the next update.
+            for i in range(4):
+                yield
+            yield from read()
+            yield from pulse(dut.reset)
+            yield from pulse(dut.update)
+            yield
+            yield from read()
+
+        run_simulation(dut, generator())
+        self.assertEqual(results[0], {
+            "cycles":     6,
+            "idle":       2,
+            "activates":  1,
+            "precharges": 1,
+            "reads":      2,
+            "writes":     1,
+            "refreshes":  1,
+        })
+        self.assertEqual(set(results[1].values()), {0})
+
+# DMA ----------------------------------------------------------------------------------------------
+
+class CrossbarStub:
+    def __init__(self):
+        self.ports = []
+
+    def get_port(self, mode, data_width=None, clock_domain="sys"):
+        port = LiteDRAMNativePort(mode, 24, data_width or 64, clock_domain)
+        self.ports.append(port)
+        return port
+
+
+class SDRAMStub:
+    def __init__(self):
+        self.crossbar = CrossbarStub()
+
+
+class DMASoC(Module):
+    def __init__(self, clock_domain="sys", loopback=False):
+        self.clock_domains.cd_sys = ClockDomain()
+        if clock_domain != "sys":
+            self.clock_domains.cd_dma = ClockDomain(clock_domain)
+        self.sdram = SDRAMStub()
+        self.csrs  = []
+        add_sdram_dma(self, 1, clock_domain=clock_domain, loopback=loopback)
+        self.read_port, self.write_port = self.sdram.crossbar.ports
+
+    def add_csr(self, name):
+        self.csrs.append(name)
+
+
+class TestSDRAMDMA(unittest.TestCase):
+    clocks = {"sys": 10, "dma": 7}
+    length = 16
+
+    def run_dma(self, clock_domain, loopback, user_generators=()):
+        soc    = DMASoC(clock_domain, loopback)
+        memory = NativePortModel({0x100 + i: 0x0123456789abcdef*(i + 1) % 2**64
+            for i in range(self.length)})
+        results = {}
+
+        def start(dma, base):
+            yield dma.base.storage.eq(base)
+            yield dma.length.storage.eq(self.length)
+            yield
+            yield dma.start.re.eq(1)
+            yield
+            yield dma.start.re.eq(0)
+
+        def control():
+            yield from start(soc.sdram_dma_writer0, 0x200)
+            yield from start(soc.sdram_dma_reader0, 0x100)
+            for i in range(8):
+                yield
+            results["busy"] = [(yield soc.sdram_dma_reader0.done.status),
+                               (yield soc.sdram_dma_writer0.done.status)]
+            for i in range(1000):
+                if ((yield soc.sdram_dma_reader0.done.status) and
+                    (yield soc.sdram_dma_writer0.done.status)):
+                    break
+                yield
+            results["cycles"] = i
+            # Let any extra access show up in the port model counts.
+            for i in range(64):
+                yield
+
+        generators = {"sys": [control()]}
+        generators.setdefault(clock_domain, []).extend(
+            [memory.read(soc.read_port), memory.write(soc.write_port)] +
+            [generator(soc) for generator in user_generators])
+        clocks = {name: period for name, period in self.clocks.items()
+            if name in ["sys", clock_domain]}
+        run_simulation(soc, generators, clocks=clocks)
+        self.assertEqual(sorted(soc.csrs), ["sdram_dma_reader0", "sdram_dma_writer0"])
+        self.assertEqual(results["busy"], [0, 0])
+        self.assertLess(results["cycles"], 999)
+        return memory
+
+    def test_loopback(self):
+        for clock_domain in ["sys", "dma"]:
+            with self.subTest(clock_domain=clock_domain):
+                memory = self.run_dma(clock_domain, loopback=True)
+                self.assertEqual(memory.reads,  self.length)
+                self.assertEqual(memory.writes, self.length)
+                for i in range(self.length):
+                    self.assertEqual(memory.mem[0x200 + i], memory.mem[0x100 + i])
+
+    def test_user(self):
+        # Without loopback, read data goes to the user logic and written data comes from it.
+        for clock_domain in ["sys", "dma"]:
+            with self.subTest(clock_domain=clock_domain):
+                received = []
+
+                @passive
+                def source(soc):
+                    source = soc.sdram_dma_reader0.source
+                    while True:
+                        yield source.ready.eq(1)
+                        yield
+                        if (yield source.valid):
+                            received.append((yield source.data))
+
+                @passive
+                def sink(soc):
+                    sink = soc.sdram_dma_writer0.sink
+                    for i in range(self.length + 4):
+                        yield sink.valid.eq(1)
+                        yield sink.data.eq(i)
+                        yield
+                        while not (yield sink.ready):
+                            yield
+                    yield sink.valid.eq(0)
+
+                memory = self.run_dma(clock_domain, False, [source, sink])
+                self.assertEqual(memory.reads,  self.length)
+                self.assertEqual(memory.writes, self.length)
+                self.assertEqual(received, [memory.mem[0x100 + i] for i in range(self.length)])
+                self.assertEqual([memory.mem[0x200 + i] for i in range(self.length)],
+                    list(range(self.length)))
+
+# Clock Phase --------------------------------------------------------------------------------------
+
+class PLLModel:
+    """PLL dynamic phase shift: phasedone goes low delay cycles after phasestep, for low cycles"""
+    def __init__(self, dut, delay=6, low=3):
+        self.dut   = dut
+        self.delay = delay
+        self.low   = low
+        self.steps = []
+        self.trace = []
+
+    @passive
+    def generator(self):
+        t = None
+        while True:
+            phasestep = (yield self.dut.phasestep)
+            if t is None and phasestep:
+                t = 0
+                self.steps.append((yield self.dut.phaseupdown))
+            phasedone = not (t is not None and self.delay <= t < self.delay + self.low)
+            yield self.dut.phasedone.eq(phasedone)
+            self.trace.append((phasestep, (yield self.dut.phasedone)))
+            if t is not None:
+                t += 1
+                if t >= self.delay + self.low and not phasestep:
+                    t = None
+            yield
+
+
+def high_runs(values):
+    runs = []
+    n = 0
+    for value in list(values) + [0]:
+        if value:
+            n += 1
+        elif n:
+            runs.append(n)
+            n = 0
+    return runs
+
+
+class TestSDRAMClockPhase(unittest.TestCase):
+    def pulse(self, csr):
+        yield csr.re.eq(1)
+        yield
+        yield csr.re.eq(0)
+
+    def step(self, dut, csr, results):
+        # Step and measure the cycles spent busy.
+        yield from self.pulse(csr)
+        for i in range(8):
+            yield
+        cycles = 8
+        while (yield dut.busy.status):
+            cycles += 1
+            yield
+        results.append(cycles)
+
+    def run_phase(self, dut, pll, generator, clock_domain="sys"):
+        generators = {"sys": [generator]}
+        generators.setdefault(clock_domain, []).append(pll.generator())
+        clocks = {"sys": 10}
+        if clock_domain != "sys":
+            dut.clock_domains.cd_pll = ClockDomain(clock_domain)
+            clocks[clock_domain] = 7
+        run_simulation(dut, generators, clocks=clocks)
+
+    def test_handshake(self):
+        # phasestep is held until phasedone goes low, busy until phasedone is back high.
+        dut = SDRAMClockPhase(handshake=True, step_cycles=4)
+        pll = PLLModel(dut, delay=6, low=3)
+        busy = []
+        def generator():
+            yield from self.step(dut, dut.up, busy)
+            yield from self.step(dut, dut.down, busy)
+        self.run_phase(dut, pll, generator())
+        self.assertEqual(pll.steps, [1, 0])
+        runs = high_runs(phasestep for phasestep, _ in pll.trace)
+        self.assertEqual(len(runs), 2)
+        self.assertTrue(all(run > pll.delay for run in runs))
+        for i in range(1, len(pll.trace)):
+            if pll.trace[i - 1][0] and not pll.trace[i][0]:
+                self.assertEqual(pll.trace[i - 1][1], 0)
+        self.assertTrue(all(cycles >= pll.delay + pll.low for cycles in busy))
+
+    def test_step_cycles(self):
+        # phasestep is held step_cycles cycles, busy 2*step_cycles cycles, phasedone is ignored.
+        dut = SDRAMClockPhase(handshake=False, step_cycles=4)
+        pll = PLLModel(dut, delay=6, low=3)
+        busy_cycles = []
+        def generator():
+            yield from self.pulse(dut.up)
+            for i in range(16):
+                busy_cycles.append((yield dut.busy.status))
+                yield
+        self.run_phase(dut, pll, generator())
+        self.assertEqual(pll.steps, [1])
+        self.assertEqual(high_runs(phasestep for phasestep, _ in pll.trace), [4])
+        self.assertEqual(high_runs(busy_cycles), [8])
+
+    def test_position(self):
+        # position counts the issued steps; up/down written while busy are ignored.
+        for clock_domain in ["sys", "pll"]:
+            for handshake in [True, False]:
+                with self.subTest(clock_domain=clock_domain, handshake=handshake):
+                    dut = SDRAMClockPhase(clock_domain, handshake=handshake, step_cycles=4)
+                    pll = PLLModel(dut)
+                    positions = []
+                    def generator():
+                        for csr in [dut.up, dut.up, dut.down, dut.down, dut.down]:
+                            yield from self.pulse(csr)
+                            # Ignored: the step is in progress.
+                            yield
+                            yield from self.pulse(dut.down if csr is dut.up else dut.up)
+                            for i in range(64):
+                                yield
+                            positions.append((yield dut.position.status))
+                    self.run_phase(dut, pll, generator(), clock_domain)
+                    self.assertEqual(pll.steps, [1, 1, 0, 0, 0])
+                    self.assertEqual(positions, [1, 2, 1, 0, 0xffff])
@@ -2,9 +2,11 @@
 # This file is Copyright (c) 2019 Tim 'mithro' Ansell <me@mith.ro>
 # License: BSD
 
-import subprocess
 import unittest
+import shutil
+import time
 import os
+import multiprocessing
 
 from migen import *
 
@@ -14,78 +16,128 @@ from litex.soc.integration.builder import *
 RUNNING_ON_TRAVIS = (os.getenv('TRAVIS', 'false').lower() == 'true')
 
 
-def build_test(socs):
+def build_test(socs, output_dir="./build"):
     errors = 0
     for soc in socs:
-        os.system("rm -rf build")
-        builder = Builder(soc, output_dir="./build", compile_software=False, compile_gateware=False)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        builder = Builder(soc, output_dir=output_dir, compile_software=False, compile_gateware=False)
         builder.build()
-        errors += not os.path.isfile("./build/gateware/top.v")
-    os.system("rm -rf build")
+        errors += not os.path.isfile(os.path.join(output_dir, "gateware", "top.v"))
+    shutil.rmtree(output_dir, ignore_errors=True)
     return errors
 
+# Platforms ----------------------------------------------------------------------------------------
 
-class TestTargets(unittest.TestCase):
-    # Build simple design for all platforms
-    def test_simple(self):
-        platforms = []
+platforms = []
+
+# Xilinx Spartan6
+platforms += [("official",  "minispartan6")]
+platforms += [("community", "sp605")]
+
+# Xilinx Artix7
+platforms += [("official",  "arty")]
+platforms += [("official",  "nexys4ddr")]
+platforms += [("official",  "nexys_video")]
+platforms += [("partner",   "netv2")]
+platforms += [("community", "ac701")]
+
+# Xilinx Kintex7
+platforms += [("official",  "kc705")]
+platforms += [("official",  "genesys2")]
+
+# Xilinx Kintex Ultrascale
+platforms += [("official",  "kcu105")]
 
-        # Xilinx Spartan6
-        platforms += [("official",  "minispartan6")]
-        platforms += [("community", "sp605")]
+# Intel Cyclone4
+platforms += [("official",  "de0nano")]
+platforms += [("community", "de2_115")]
 
-        # Xilinx Artix7
-        platforms += [("official",  "arty")]
-        platforms += [("official",  "nexys4ddr")]
-        platforms += [("official",  "nexys_video")]
-        platforms += [("partner",   "netv2")]
-        platforms += [("community", "ac701")]
+# Intel Cyclone5
+platforms += [("community", "de1soc")]
 
-        # Xilinx Kintex7
-        platforms += [("official",  "kc705")]
-        platforms += [("official",  "genesys2")]
+# Intel Max10
+platforms += [("community", "de10lite")]
 
-        # Xilinx Kintex Ultrascale
-        platforms += [("official",  "kcu105")]
+# Lattice iCE40
+platforms += [("partner",   "tinyfpga_bx")]
+platforms += [("partner",   "fomu_evt")]
+platforms += [("partner",   "fomu_hacker")]
+platforms += [("partner",   "fomu_pvt")]
 
-        # Intel Cyclone4
-        platforms += [("official",  "de0nano")]
-        platforms += [("community", "de2_115")]
+# Lattice MachXO2
+platforms += [("official",  "machxo3")]
 
-        # Intel Cyclone5
-        platforms += [("community", "de1soc")]
+# Lattice ECP3
+platforms += [("official",  "versa_ecp3")]
 
-        # Intel Max10
-        platforms += [("community", "de10lite")]
+# Lattice ECP5
+platforms += [("official",  "versa_ecp5")]
+platforms += [("partner",   "ulx3s")]
+platforms += [("partner",   "trellisboard")]
+platforms += [("community", "ecp5_evn")]
 
-        # Lattice iCE40
-        platforms += [("partner",   "tinyfpga_bx")]
-        platforms += [("partner",   "fomu_evt")]
-        platforms += [("partner",   "fomu_hacker")]
-        platforms += [("partner",   "fomu_pvt")]
+# Microsemi PolarFire
+platforms += [("official",  "avalanche")]
 
-        # Lattice MachXO2
-        platforms += [("official",  "machxo3")]
+# Parallel generation ------------------------------------------------------------------------------
 
-        # Lattice ECP3
-        platforms += [("official",  "versa_ecp3")]
+def generate_simple(s, p, output_dir):
+    """Generate the simple design for one platform in its own output_dir/<platform> directory.
 
-        # Lattice ECP5
-        platforms += [("official",  "versa_ecp5")]
-        platforms += [("partner",   "ulx3s")]
-        platforms += [("partner",   "trellisboard")]
-        platforms += [("community", "ecp5_evn")]
+    Runs in-process: the Migen/LiteX imports are inherited from the parent of the pool worker.
+    Returns a (platform, error, duration) tuple, error being None on success.
+    """
+    from litex_boards.official.targets import simple
+    [(_, error, duration)] = simple.build_batch(["litex_boards.{}.platforms.{}".format(s, p)],
+        output_dir     = output_dir,
+        builder_kwargs = dict(compile_software=False, compile_gateware=False),
+        cpu_type       = "vexriscv",
+        uart_stub      = True)
+    if error is None and not os.path.isfile(os.path.join(output_dir, p, "gateware", "top.v")):
+        error = "no gateware generated"
+    return (p, error, duration)
 
-        # Microsemi PolarFire
-        platforms += [("official",  "avalanche")]
 
-        for s, p in platforms:
+def generate_parallel(platforms, output_dir="./build", jobs=None):
+    """Generate the simple design for all platforms over a process pool.
+
+    Each platform is built in output_dir/<platform>, so generations never share a directory, and
+    in its own worker, so module-level state of a build never leaks to the next one. Workers are
+    forked (when supported) after the target is imported: they don't pay the imports again.
+    Returns the list of (platform, error, duration) tuples, in platforms order.
+    """
+    from litex_boards.official.targets import simple # Imported before forking the workers.
+    jobs = jobs or int(os.getenv("LITEX_BOARDS_JOBS", os.cpu_count() or 1))
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if fork else None)
+    with context.Pool(jobs, maxtasksperchild=1) as pool:
+        return pool.starmap(generate_simple, [(s, p, output_dir) for s, p in platforms])
+
+
+class TestTargets(unittest.TestCase):
+    # Build simple design for all platforms
+    def test_simple(self):
+        output_dir = "./build/test_simple"
+        shutil.rmtree(output_dir, ignore_errors=True)
+        results = generate_parallel(platforms, output_dir)
+        for p, error, duration in results:
             with self.subTest(platform=p):
-                cmd = """\
-litex_boards/official/targets/simple.py litex_boards.{s}.platforms.{p} \
-    --cpu-type=vexriscv     \
-    --no-compile-software   \
-    --no-compile-gateware   \
-    --uart-stub=True        \
-""".format(s=s, p=p)
-                subprocess.check_call(cmd, shell=True)
+                self.assertIsNone(error, "{}: {}".format(p, error))
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+class TestDE0Nano(unittest.TestCase):
+    def test_altpll_config(self):
+        from litex_boards.official.targets.de0nano import _altpll_config
+        # Highest VCO frequency: 50MHz is still generated as 1/1 (baseline).
+        self.assertEqual(_altpll_config(50e6, 50e6), (1, 1, 1300e6))
+        self.assertEqual(_altpll_config(50e6, 100e6), (2, 1, 1300e6))
+        # 142MHz: 1278MHz VCO would need a 2MHz PFD, 710MHz is the highest valid VCO.
+        self.assertEqual(_altpll_config(50e6, 142e6), (71, 25, 710e6))
+        for sys_clk_freq in range(int(25e6), int(143e6), int(1e6)):
+            multiply_by, divide_by, vco_freq = _altpll_config(50e6, sys_clk_freq)
+            self.assertEqual(50e6*multiply_by, sys_clk_freq*divide_by)
+            self.assertTrue(600e6 <= vco_freq <= 1300e6)
+            self.assertEqual(vco_freq % sys_clk_freq, 0)
+        with self.assertRaises(ValueError):
+            _altpll_config(50e6, 1e6)